@@ -0,0 +1,83 @@
+import time
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+DEFAULT_MAX_SESSIONS = 200
+DEFAULT_IDLE_TTL_SECONDS = 3600
+
+class _Slot:
+    def __init__(self, agent):
+        self.agent = agent
+        self.lock = threading.Lock()  # One run at a time per session
+        self.busy = 0
+        self.last_used = time.time()
+
+class AgentPool:
+    """
+    Session-scoped CodeAgent instances.
+
+    Each session gets its own agent (and therefore its own run memory); runs of
+    the same session are serialized, different sessions run concurrently.
+    Idle sessions are evicted least-recently-used first once `max_sessions` is
+    exceeded or after `idle_ttl` seconds.
+    """
+    def __init__(self, factory: Callable[[], object], max_sessions: int = DEFAULT_MAX_SESSIONS,
+                 idle_ttl: float = DEFAULT_IDLE_TTL_SECONDS):
+        self.factory = factory
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self._slots: "OrderedDict[str, _Slot]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._slots)
+
+    def _evict(self, now: float):
+        # Caller holds self._lock. Busy sessions are never evicted.
+        for session_id in list(self._slots):
+            slot = self._slots[session_id]
+            if slot.busy:
+                continue
+            if len(self._slots) > self.max_sessions or now - slot.last_used > self.idle_ttl:
+                del self._slots[session_id]
+
+    def _checkout(self, session_id: str) -> _Slot:
+        with self._lock:
+            now = time.time()
+            slot = self._slots.get(session_id)
+            if slot is None:
+                slot = _Slot(self.factory())
+                self._slots[session_id] = slot
+            self._slots.move_to_end(session_id)
+            slot.busy += 1
+            slot.last_used = now
+            self._evict(now)
+            return slot
+
+    def _checkin(self, slot: _Slot):
+        with self._lock:
+            slot.busy -= 1
+            slot.last_used = time.time()
+
+    @contextmanager
+    def session(self, session_id: str):
+        """Yield the session's agent, held exclusively for the duration of the block."""
+        slot = self._checkout(session_id)
+        try:
+            with slot.lock:
+                yield slot.agent
+        finally:
+            self._checkin(slot)
+
+    def run(self, session_id: str, *args, **kwargs):
+        """Stream `agent.run(...)` on the session's agent."""
+        with self.session(session_id) as agent:
+            yield from agent.run(*args, session_id=session_id, **kwargs)
+
+    def get(self, session_id: str) -> Optional[object]:
+        with self._lock:
+            slot = self._slots.get(session_id)
+            return slot.agent if slot else None
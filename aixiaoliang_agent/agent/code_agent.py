@@ -1,12 +1,14 @@
 import os
 import re
 import time
-import json
-import io
-import sys
+import inspect
+import datetime
 from typing import List, Optional, Dict, Any
 from dotenv import load_dotenv
 import google.generativeai as genai
+from .llm_session import LLMSession
+from .session_log import SessionLogWriter
+from .executor import ExecutionError, create_executor
 
 # Load environment variables
 load_dotenv()
@@ -20,6 +22,15 @@ if os.getenv("HTTP_PROXY"):
     os.environ["http_proxy"] = os.getenv("HTTP_PROXY")
     os.environ["https_proxy"] = os.getenv("HTTPS_PROXY")
 
+# Tail of the running code's stdout shown while it executes
+LIVE_OUTPUT_CHARS = 2000
+
+class LiveOutput(str):
+    """Partial stdout of the running code; displayed transiently, never added to the trace."""
+
+# A complete python block; matching it mid-stream means the code is ready to run
+CODE_BLOCK_PATTERN = re.compile(r"```python\n(.*?)```", re.DOTALL)
+
 # --- Memory Structures (ReAct) ---
 class Step:
     def to_string(self):
@@ -64,23 +75,32 @@ class CodeAgent:
         self.memory: List[Step] = []
         self.max_steps = 15  # Allow up to 15 steps (Self-Correction)
         
-        # Capture System/Env Proxy for isolation (Ping-Pong Strategy)
-        self.sys_http_proxy = os.getenv("HTTP_PROXY")
-        self.sys_https_proxy = os.getenv("HTTPS_PROXY")
+        # Prompt caches: system prompt (per tool set + date), prefix (per history), turns (append-only)
+        self._system_prompt_cache = (None, "")
+        self._prefix_cache = (None, "")
+        self._turns: List[Dict[str, Any]] = []
+        self._llm_session: Optional[LLMSession] = None
+        self.executor = create_executor()
+        self._exec_run = None
+        self._session_id: Optional[str] = None
 
     def _build_system_prompt(self) -> str:
-        import datetime
+        """
+        Static system prompt; rebuilt only when the tool set or the date changes.
+        """
         today = datetime.date.today().strftime("%Y-%m-%d")
+        cache_key = (today, tuple((name, id(tool)) for name, tool in self.tools.items()))
+        if self._system_prompt_cache[0] == cache_key:
+            return self._system_prompt_cache[1]
         
         tool_descriptions = []
         for name, tool in self.tools.items():
-            import inspect
             sig = inspect.signature(tool.func)
             tool_descriptions.append(f"- {name}{sig}: {tool.description}")
         
         tool_desc_str = "\n".join(tool_descriptions)
         
-        return f"""You are '小亮' (AiXiaoliang), a professional financial analysis agent. 
+        system_prompt = f"""You are '小亮' (AiXiaoliang), a professional financial analysis agent. 
 **Current Date: {today}**
 
 ### 🎯 Core Mission: Efficiency First
@@ -91,6 +111,11 @@ class CodeAgent:
 ### Available Tools
 {tool_desc_str}
 
+Every tool also has an async variant named `<tool>_async`. To run independent calls concurrently (e.g. several stocks, or price + financials), pass them to `gather`, which returns the results in order:
+`price, fin = gather(get_current_price_async('600519.SH'), get_stock_financials_async('600519.SH'))`
+For the same data on several stocks (e.g. an industry comparison), call the `*_batch` tool once with the list of codes instead of looping.
+Tool results are dicts `{{'status', 'data', 'meta', 'error'}}`: `json.dumps(res, ensure_ascii=False)` works with the default `data_format='records'`; with 'frame' / 'columns' the data is a DataFrame / NumPy arrays, so print it (or `.to_dict('records')`) instead.
+
 ### 🧠 Analysis Methodologies (Mental Models)
 Use these when in "Analysis Mode" (requested by user):
 1. **Value Persona**: PE/PB/Dividend history.
@@ -115,7 +140,12 @@ Use `search_knowledge` for formulas/keys. Use `search_stock` for codes.
 
 **Rule #4: NO HTML TAGS.** 
 Do NOT use `<details>`, `<summary>`, or any other HTML tags. These are reserved for the system UI.
+
+**Rule #5: REUSE VARIABLES.**
+Variables from earlier code steps of the current task stay defined. If a DataFrame you need is listed under "Variables in memory", refine it directly instead of calling the tool again.
 """
+        self._system_prompt_cache = (cache_key, system_prompt)
+        return system_prompt
 
     def _sanitize_history(self, history: List[str]) -> List[str]:
         """
@@ -173,8 +203,17 @@ Do NOT use `<details>`, `<summary>`, or any other HTML tags. These are reserved
 
         return clean_history
 
-    def _build_prompt_from_memory(self, history: List[str] = None) -> str:
+    def get_prompt_prefix(self, history: List[str] = None) -> str:
+        """
+        The part of the prompt that is fixed for a whole run: system prompt and
+        sanitized conversation history. It is sent as the system instruction
+        (or an explicit context cache) and cached until the system prompt or the
+        history changes.
+        """
         system = self._build_system_prompt()
+        cache_key = (self._system_prompt_cache[0], tuple(history or ()))
+        if self._prefix_cache[0] == cache_key:
+            return self._prefix_cache[1]
         
         # Add Conversation History (Memory)
         context_str = ""
@@ -184,15 +223,46 @@ Do NOT use `<details>`, `<summary>`, or any other HTML tags. These are reserved
             context_str = "\n\nConversation History:\n" + "\n".join(clean_history)
             
         print(f"DEBUG: Final Context passed to LLM:\n{repr(context_str)}")
-            
-        # Add Current Steps (ReAct Trace)
-        steps_str = "\n\n".join([step.to_string() for step in self.memory if not isinstance(step, TaskStep)])
-        
-        # Current Task is always the first Step for this run
-        current_task = self.memory[0].task if self.memory else "No Task"
         
-        return f"{system}{context_str}\n\nCurrent Task: {current_task}\n\nExisting Steps:\n{steps_str}\n\nYour Next Step (Write Python Code):"
+        prefix = f"{system}{context_str}"
+        self._prefix_cache = (cache_key, prefix)
+        return prefix
 
+    def _remember(self, step: Step):
+        """
+        Append a step to memory and to the run's chat turns: the task and
+        observations/errors are user turns, thoughts are model turns. Code is
+        already part of the thought that contained it.
+        """
+        self.memory.append(step)
+        if isinstance(step, CodeStep):
+            return
+        role = "model" if isinstance(step, ThoughtStep) else "user"
+        text = step.thought if role == "model" else step.to_string()
+        if isinstance(step, TaskStep):
+            text = f"Current Task: {step.task}"
+        if self._turns and self._turns[-1]["role"] == role:
+            self._turns[-1]["parts"][0] += f"\n\n{text}"
+        else:
+            self._turns.append({"role": role, "parts": [text]})
+
+    def _build_contents(self) -> List[Dict[str, Any]]:
+        """
+        The turns for the next model call: all recorded turns plus the request
+        for the next step (merged into the last user turn), listing the variables
+        the run's code has defined so far.
+        """
+        next_step = "Your Next Step (Write Python Code):"
+        variables = self._exec_run.variables() if self._exec_run is not None else []
+        if variables:
+            listing = "\n".join(f"- {v}" for v in variables)
+            next_step = f"Variables in memory (reuse them instead of re-fetching):\n{listing}\n\n{next_step}"
+        contents = [{"role": t["role"], "parts": list(t["parts"])} for t in self._turns]
+        if contents and contents[-1]["role"] == "user":
+            contents[-1]["parts"][0] += f"\n\n{next_step}"
+        else:
+            contents.append({"role": "user", "parts": [next_step]})
+        return contents
 
     def run(self, user_input: str, history: Optional[List[str]] = None, stream_mode: str = "delta", session_id: str = None, log_subdir: str = ""):
         if history is None:
@@ -209,10 +279,10 @@ Do NOT use `<details>`, `<summary>`, or any other HTML tags. These are reserved
                 full_buffer += chunk
             return full_buffer if stream_mode == "full" else chunk
 
-        def render_display(is_final=False):
-            """Helper to render the current trace + final answer"""
+        def render_display(is_final=False, pending=""):
+            """Helper to render the current trace (+ text still streaming in) + final answer"""
             status_attr = "" if is_final else "open"
-            accordion = f"<details {status_attr}>\n<summary>💡 思考过程 (后台解析中...)</summary>\n\n{trace_md}\n</details>"
+            accordion = f"<details {status_attr}>\n<summary>💡 思考过程 (后台解析中...)</summary>\n\n{trace_md}{pending}\n</details>"
             if is_final:
                 # Show final answer cleanly below the accordion
                 # Prefix it with a clear header if it doesn't already have one
@@ -223,7 +293,10 @@ Do NOT use `<details>`, `<summary>`, or any other HTML tags. These are reserved
             return accordion
 
         # Reset Memory for this run
-        self.memory = [TaskStep(user_input)]
+        self.memory = []
+        self._turns = []
+        self._remember(TaskStep(user_input))
+        self._llm_session = LLMSession(self.model_name, self.get_prompt_prefix(history))
         
         # Session Logging Setup
         if not session_id:
@@ -234,19 +307,13 @@ Do NOT use `<details>`, `<summary>`, or any other HTML tags. These are reserved
             os.makedirs(log_dir)
             
         log_file = os.path.join(log_dir, f"{session_id}.jsonl")
+        self._session_id = session_id
         
-        log_entry = {
-            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
-            "query": user_input,
-            "steps": []
-        }
-        
-        def save_incremental_log():
-            try:
-                with open(log_file, "w", encoding="utf-8") as f:
-                    f.write(json.dumps(log_entry, ensure_ascii=False, indent=2) + "\n")
-            except Exception as e:
-                print(f"DEBUG: Failed to write incremental log: {e}")
+        session_log = SessionLogWriter(log_file)
+        session_log.write({"event": "run_start", "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"), "query": user_input})
+
+        def log_step(step: Dict[str, Any]):
+            session_log.write({"event": "step", **step})
             
         start_time = time.time()
         step_count = 0
@@ -258,38 +325,39 @@ Do NOT use `<details>`, `<summary>`, or any other HTML tags. These are reserved
         try:
             while step_count < self.max_steps:
                 try:
-                    prompt = self._build_prompt_from_memory(history)
+                    contents = self._build_contents()
                     
                     # Call LLM
                     llm_start = time.time()
-                    # Restore System Proxy
-                    if self.sys_http_proxy:
-                        os.environ["HTTP_PROXY"] = self.sys_http_proxy
-                    else:
-                        os.environ.pop("HTTP_PROXY", None)
-                        
-                    if self.sys_https_proxy:
-                        os.environ["HTTPS_PROXY"] = self.sys_https_proxy
-                    else:
-                        os.environ.pop("HTTPS_PROXY", None)
-
-                    model = genai.GenerativeModel(self.model_name)
-                    response = model.generate_content(prompt)
+                    
+                    # Stream tokens into the trace; stop as soon as the python block is closed
+                    content = ""
+                    first_token_latency = None
+                    code_match = None
+                    stream = self._generate_stream(contents)
+                    for delta in stream:
+                        if first_token_latency is None:
+                            first_token_latency = time.time() - llm_start
+                        content += delta
+                        code_match = CODE_BLOCK_PATTERN.search(content)
+                        if code_match:
+                            # Anything after the closing fence (e.g. a hallucinated Observation) is dropped
+                            content = content[:code_match.end()]
+                            break
+                        live_text = re.sub(r'<[^>]+>', '', content)
+                        yield yield_content(render_display(pending=f"\n#### 🧠 Step {step_count+1}\n{live_text}\n"), replace=True)
+                    stream.close()
                     llm_latency = time.time() - llm_start
                     
-                    if not response.parts:
+                    if not content.strip():
                         err = "[!] Empty Response from Model."
                         trace_md += f"\n{err}\n"
                         yield yield_content(render_display(), replace=True)
                         break
                         
-                    content = response.text
-                    self.memory.append(ThoughtStep(content))
-                    log_entry["steps"].append({"type": "thought", "content": content, "latency": llm_latency, "attempt": step_count+1})
-                    save_incremental_log()
-                    
-                    # Extract Code
-                    code_match = re.search(r"```python\n(.*?)```", content, re.DOTALL)
+                    self._remember(ThoughtStep(content))
+                    log_step({"type": "thought", "content": content, "latency": llm_latency, "first_token_latency": first_token_latency, "attempt": step_count+1})
+                    session_log.flush()
                     
                     if code_match:
                         # Clean LLM chatter to keep trace technical
@@ -306,8 +374,8 @@ Do NOT use `<details>`, `<summary>`, or any other HTML tags. These are reserved
                         yield yield_content(render_display(), replace=True)
                         
                         code = code_match.group(1)
-                        self.memory.append(CodeStep(code))
-                        log_entry["steps"].append({"type": "code", "content": code})
+                        self._remember(CodeStep(code))
+                        log_step({"type": "code", "content": code})
                         
                         # Execute Code
                         exec_start = time.time()
@@ -320,6 +388,9 @@ Do NOT use `<details>`, `<summary>`, or any other HTML tags. These are reserved
                             for chunk in exec_gen:
                                 if isinstance(chunk, Exception):
                                     execution_error = chunk
+                                elif isinstance(chunk, LiveOutput):
+                                    live = f"</details>\n\n```text\n{chunk}\n```\n"
+                                    yield yield_content(render_display(pending=live), replace=True)
                                 else:
                                     execution_result += chunk
                                     trace_md += chunk
@@ -331,18 +402,17 @@ Do NOT use `<details>`, `<summary>`, or any other HTML tags. These are reserved
                         
                         if execution_error:
                             error_msg = str(execution_error)
-                            self.memory.append(ErrorStep(error_msg))
-                            log_entry["steps"].append({"type": "error", "content": error_msg, "latency": exec_latency})
+                            self._remember(ErrorStep(error_msg))
+                            log_step({"type": "error", "content": error_msg, "latency": exec_latency})
                             trace_md += f"\n⚠️ 执行错误: {error_msg}\n正在尝试修复...\n"
                             yield yield_content(render_display(), replace=True)
                         else:
-                            self.memory.append(ObservationStep(execution_result))
-                            log_entry["steps"].append({"type": "execution_trace", "content": execution_result, "latency": exec_latency})
-                            save_incremental_log()
+                            self._remember(ObservationStep(execution_result))
+                            log_step({"type": "execution_trace", "content": execution_result, "latency": exec_latency})
                             
                             if self._is_suspicious_output(execution_result):
                                 warning_msg = "System Warning: Output appears invalid. Self-Correction Triggered."
-                                self.memory.append(ObservationStep(warning_msg))
+                                self._remember(ObservationStep(warning_msg))
                                 trace_md += f"\n⚠️ {warning_msg}\n"
                                 yield yield_content(render_display(), replace=True)
                             else:
@@ -377,6 +447,7 @@ Do NOT use `<details>`, `<summary>`, or any other HTML tags. These are reserved
                     yield yield_content(render_display(), replace=True)
                     break
                     
+                session_log.flush() # Step boundary
                 step_count += 1
 
             if not final_success and step_count == self.max_steps:
@@ -386,9 +457,28 @@ Do NOT use `<details>`, `<summary>`, or any other HTML tags. These are reserved
             yield yield_content(render_display(is_final=True), replace=True)
 
         finally:
-            save_incremental_log() # Ensure final state is saved
-
-
+            session_log.write({
+                "event": "run_end",
+                "success": final_success,
+                "duration": time.time() - start_time,
+                "context_cache": self._llm_session.uses_context_cache,
+                "tool_cache": self._exec_run.tool_cache_stats() if self._exec_run is not None else None,
+                "tushare_quota": self._exec_run.quota_stats() if self._exec_run is not None else None,
+            })
+            self._llm_session.close()
+            if self._exec_run is not None:
+                self._exec_run.close()
+                self._exec_run = None
+            session_log.close() # Ensure final state is saved
+
+
+
+    def _generate_stream(self, contents: List[Dict[str, Any]]):
+        """
+        Yield the model's response text incrementally as chunks arrive.
+        Closing the generator early stops reading the stream.
+        """
+        yield from self._llm_session.generate_stream(contents)
 
     def _is_suspicious_output(self, output: str) -> bool:
         """
@@ -403,6 +493,12 @@ Do NOT use `<details>`, `<summary>`, or any other HTML tags. These are reserved
              return True
         return False
 
+    def _get_exec_run(self):
+        """Executor context for the current run, started on first code execution."""
+        if self._exec_run is None:
+            self._exec_run = self.executor.start_run(self.tools, session_id=self._session_id)
+        return self._exec_run
+
     # Helper to run code and yield output chunks
     def _execute_code_generator(self, code: str):
         yield f"""
@@ -412,36 +508,12 @@ Do NOT use `<details>`, `<summary>`, or any other HTML tags. These are reserved
 {code}
 ```
 """
-        import io, sys
-        old_stdout = sys.stdout
-        redirected_output = io.StringIO()
-        sys.stdout = redirected_output
-        
-        exec_globals = {"__name__": "__main__", "print": print}
-        
-        # Tool Logging Wrapper
-        def make_logged_tool(tool_name, tool_func):
-            def logged_wrapper(*args, **kwargs):
-                arg_str = ", ".join([repr(a) for a in args] + [f"{k}={v!r}" for k, v in kwargs.items()])
-                print(f"🔧 [Tool Call] {tool_name}({arg_str})")
-                try:
-                    res = tool_func(*args, **kwargs)
-                    res_str = str(res)
-                    if len(res_str) > 200: res_str = res_str[:200] + "... (truncated)"
-                    print(f"   -> [Result] {res_str}")
-                    return res
-                except Exception as e:
-                    print(f"   -> [Error] {e}")
-                    raise e
-            return logged_wrapper
-
-        for name, tool in self.tools.items():
-            exec_globals[name] = make_logged_tool(name, tool.func)
-            
         try:
-            exec(code, exec_globals)
-            sys.stdout = old_stdout
-            result = redirected_output.getvalue()
+            # Stream stdout while the code runs (shown live, replaced by the formatted result)
+            result = ""
+            for chunk in self._get_exec_run().execute(code):
+                result += chunk
+                yield LiveOutput(result[-LIVE_OUTPUT_CHARS:])
             
             # Format Output
             lines = result.split('\n')
@@ -462,8 +534,7 @@ Do NOT use `<details>`, `<summary>`, or any other HTML tags. These are reserved
             else:
                 yield "\n*(No text output)*\n"
             
-        except Exception as e:
-            sys.stdout = old_stdout
+        except ExecutionError as e:
             yield "</details>\n"
             yield f"### ❌ Execution Error\n```text\n{e}\n```\n"
-            yield e # Yield exception object to caller to signal failure
+            yield e.error # Yield exception object to caller to signal failure
@@ -0,0 +1,299 @@
+import io
+import os
+import ast
+import sys
+import time
+import types
+import asyncio
+import inspect
+import threading
+import contextvars
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+import pandas as pd
+from ..tools.data_utils import Envelope, copy_payload
+from ..tools.registry import Tool
+from ..tools.rate_limiter import get_tushare_limiter, quota_session
+
+# Buffer receiving stdout for the current execution context (None = real stdout)
+_CAPTURE: contextvars.ContextVar[Optional[io.StringIO]] = contextvars.ContextVar("stdout_capture", default=None)
+_INSTALL_LOCK = threading.Lock()
+
+class _RoutedStdout:
+    """
+    Process-wide sys.stdout replacement that writes to the current context's
+    capture buffer, or to the original stream when nothing is capturing.
+    Installed once; concurrent executions never swap sys.stdout themselves.
+
+    A plain object rather than an io.TextIOBase subclass, whose own `encoding`,
+    `fileno`, `isatty`, ... would shadow the real stream's.
+    """
+    def __init__(self, fallback):
+        self._fallback = fallback
+
+    def _target(self):
+        buf = _CAPTURE.get()
+        return buf if buf is not None else self._fallback
+
+    def write(self, s):
+        return self._target().write(s)
+
+    def flush(self):
+        self._target().flush()
+
+    def writable(self):
+        return True
+
+    def __getattr__(self, name):
+        # encoding, errors, buffer, fileno, isatty, ... come from the real stream
+        return getattr(self._fallback, name)
+
+def install_stdout_router():
+    """Route sys.stdout through the context-aware proxy (idempotent)."""
+    with _INSTALL_LOCK:
+        if not isinstance(sys.stdout, _RoutedStdout):
+            sys.stdout = _RoutedStdout(sys.stdout)
+
+@contextmanager
+def capture_output():
+    """
+    Capture everything printed in this execution context (this thread, and any
+    thread started with a copy of its context) into a fresh buffer.
+    """
+    install_stdout_router()
+    buf = io.StringIO()
+    token = _CAPTURE.set(buf)
+    try:
+        yield buf
+    finally:
+        _CAPTURE.reset(token)
+
+class ExecutionError(Exception):
+    """Generated code raised; `output` holds what it printed before failing."""
+    def __init__(self, error: BaseException, output: str = ""):
+        super().__init__(str(error))
+        self.error = error
+        self.output = output
+
+class ToolMemo:
+    """
+    Per-run memo of tool results, keyed by tool name and bound arguments
+    (so `f('x')` and `f(arg='x')` share an entry). Only tools declaring a
+    `cache_ttl` are memoized; errors are never stored.
+
+    Entries are copies and every hit returns a fresh copy, because generated
+    code mutates results in place (`df = res['data']; df.dropna(inplace=True)`).
+    """
+    def __init__(self):
+        self._entries: Dict[Tuple[str, str], Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(name: str, func: Callable, args: tuple, kwargs: dict) -> Tuple[str, str]:
+        try:
+            bound = inspect.signature(func).bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = sorted(bound.arguments.items())
+        except (TypeError, ValueError):
+            arguments = [args, sorted(kwargs.items())]
+        return (name, repr(arguments))
+
+    def get(self, key: Tuple[str, str]) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.time():
+                self.misses += 1
+                return False, None
+            self.hits += 1
+        return True, copy_payload(entry[1])
+
+    def put(self, key: Tuple[str, str], value: Any, ttl: float):
+        value = copy_payload(value)
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            calls = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses,
+                    "hit_rate": round(self.hits / calls, 3) if calls else None}
+
+def _preview(res: Any) -> str:
+    # Envelope preview is bounded and never materializes the payload
+    if isinstance(res, Envelope):
+        return res.preview(limit=200)
+    res_str = str(res)
+    if len(res_str) > 200: res_str = res_str[:200] + "... (truncated)"
+    return res_str
+
+def make_logged_tool(tool: Tool, memo: Optional[ToolMemo] = None) -> Callable:
+    """
+    Wrap a tool so each call and a bounded preview of its result are printed.
+    With a memo, repeated calls of cacheable tools are answered from memory.
+    """
+    tool_name, tool_func = tool.name, tool.func
+    cacheable = memo is not None and tool.cache_ttl is not None
+
+    def logged_wrapper(*args, **kwargs):
+        arg_str = ", ".join([repr(a) for a in args] + [f"{k}={v!r}" for k, v in kwargs.items()])
+        print(f"🔧 [Tool Call] {tool_name}({arg_str})")
+        if cacheable:
+            key = memo.make_key(tool_name, tool_func, args, kwargs)
+            found, res = memo.get(key)
+            if found:
+                print(f"   -> [Cached] {_preview(res)}")
+                return res
+        try:
+            res = tool_func(*args, **kwargs)
+            print(f"   -> [Result] {_preview(res)}")
+            if cacheable and not (isinstance(res, Envelope) and res["status"] == "error"):
+                memo.put(key, res, tool.cache_ttl)
+            return res
+        except Exception as e:
+            print(f"   -> [Error] {e}")
+            raise e
+    return logged_wrapper
+
+def make_async_tool(logged: Callable) -> Callable:
+    """
+    Coroutine variant of a logged tool. The blocking call runs on a worker
+    thread with a copy of the caller's context, so its output is still
+    captured and its Tushare calls still count against the run's session.
+    """
+    async def async_wrapper(*args, **kwargs):
+        return await asyncio.to_thread(logged, *args, **kwargs)
+    async_wrapper.__name__ = f"{getattr(logged, '__name__', 'tool')}_async"
+    return async_wrapper
+
+def get_gather_workers() -> int:
+    """Threads available to concurrent tool calls in one `gather` (GATHER_MAX_WORKERS)."""
+    return int(os.getenv("GATHER_MAX_WORKERS", "16"))
+
+def _run_coroutine(coro) -> Any:
+    """Run `coro` to completion from synchronous code, on its own event loop."""
+    async def main():
+        loop = asyncio.get_running_loop()
+        pool = ThreadPoolExecutor(max_workers=get_gather_workers(), thread_name_prefix="gather")
+        loop.set_default_executor(pool)  # asyncio.run shuts it down on exit
+        return await coro
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(main())
+    # Called from inside a running loop: drive ours on a helper thread
+    ctx = contextvars.copy_context()
+    with ThreadPoolExecutor(max_workers=1) as helper:
+        return helper.submit(ctx.run, asyncio.run, main()).result()
+
+def gather(*calls) -> List[Any]:
+    """
+    Run independent `*_async` tool calls concurrently and return their results
+    in order, e.g. `price, fin = gather(get_current_price_async(c), get_stock_financials_async(c))`.
+    """
+    async def gather_all():
+        return list(await asyncio.gather(*calls))
+    return _run_coroutine(gather_all())
+
+def build_namespace(tools: Dict[str, Tool], memo: Optional[ToolMemo] = None) -> Dict[str, Any]:
+    """
+    Globals for generated code: the tools (logged, memoized), an `<name>_async`
+    variant of each, and `gather` to run async calls concurrently.
+    """
+    namespace = {"__name__": "__main__", "print": print, "gather": gather}
+    for name, tool in tools.items():
+        logged = make_logged_tool(tool, memo)
+        namespace[name] = logged
+        namespace[f"{name}_async"] = make_async_tool(logged)
+    return namespace
+
+def exec_code(code: str, namespace: Dict[str, Any]):
+    """`exec` that also accepts top-level `await` (e.g. `await asyncio.gather(...)`)."""
+    compiled = compile(code, "<string>", "exec", flags=ast.PyCF_ALLOW_TOP_LEVEL_AWAIT)
+    if compiled.co_flags & inspect.CO_COROUTINE:
+        _run_coroutine(types.FunctionType(compiled, namespace)())
+    else:
+        exec(compiled, namespace)
+
+MAX_LISTED_VARIABLES = 30
+MAX_LISTED_COLUMNS = 12
+
+def _describe_value(value: Any) -> str:
+    if isinstance(value, pd.DataFrame):
+        columns = [str(c) for c in value.columns[:MAX_LISTED_COLUMNS]]
+        more = ", ..." if len(value.columns) > MAX_LISTED_COLUMNS else ""
+        return f"DataFrame {value.shape[0]}x{value.shape[1]} [{', '.join(columns)}{more}]"
+    if isinstance(value, pd.Series):
+        return f"Series len={len(value)}"
+    if isinstance(value, Envelope):
+        return f"Envelope status={value['status']} rows={value.row_count()}"
+    if isinstance(value, (list, tuple, dict, set)):
+        return f"{type(value).__name__} len={len(value)}"
+    if callable(value):
+        return "function"
+    text = repr(value)
+    if len(text) > 60: text = text[:60] + "..."
+    return f"{type(value).__name__} = {text}"
+
+def describe_namespace(namespace: Dict[str, Any], hidden: Set[str]) -> List[str]:
+    """One line per variable the generated code defined (`name: type/shape`)."""
+    lines = []
+    for name, value in namespace.items():
+        if name.startswith("_") or name in hidden or isinstance(value, types.ModuleType):
+            continue
+        lines.append(f"{name}: {_describe_value(value)}")
+    return lines[-MAX_LISTED_VARIABLES:]
+
+class _InProcessRun:
+    """One agent run: variables defined by a step stay visible to later steps."""
+    def __init__(self, executor: "InProcessExecutor", tools: Dict[str, Tool], session_id: Optional[str] = None):
+        self.executor = executor
+        self.session_id = session_id
+        self.memo = ToolMemo()
+        self.namespace = build_namespace(tools, self.memo)
+        self._hidden = set(self.namespace)
+
+    def execute(self, code: str) -> Iterator[str]:
+        with quota_session(self.session_id):
+            output = self.executor.execute(code, self.namespace)
+        yield output
+
+    def variables(self) -> List[str]:
+        return describe_namespace(self.namespace, self._hidden)
+
+    def tool_cache_stats(self) -> Dict[str, Any]:
+        return self.memo.stats()
+
+    def quota_stats(self) -> Optional[Dict[str, Any]]:
+        """Tushare calls made on behalf of this run's session."""
+        return get_tushare_limiter().session_stats(self.session_id) if self.session_id else None
+
+    def close(self):
+        pass
+
+class InProcessExecutor:
+    """
+    Runs generated code in the current process with per-execution stdout capture,
+    so parallel runs (one thread each) never see each other's output.
+    """
+    def start_run(self, tools: Dict[str, Tool], session_id: Optional[str] = None) -> _InProcessRun:
+        """Execution context for one agent run; `execute(code)` yields stdout chunks."""
+        return _InProcessRun(self, tools, session_id)
+
+    def execute(self, code: str, namespace: Dict[str, Any]) -> str:
+        with capture_output() as buf:
+            try:
+                exec_code(code, namespace)
+            except Exception as e:
+                raise ExecutionError(e, buf.getvalue()) from e
+        return buf.getvalue()
+
+def create_executor():
+    """Executor selected by EXECUTOR_MODE: 'inprocess' (default) or 'sandbox'."""
+    mode = os.getenv("EXECUTOR_MODE", "inprocess").lower()
+    if mode == "sandbox":
+        from .sandbox import get_sandbox_executor
+        return get_sandbox_executor()
+    return InProcessExecutor()
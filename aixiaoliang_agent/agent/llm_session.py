@@ -0,0 +1,95 @@
+import os
+import datetime
+from typing import Any, Dict, List, Optional
+import google.generativeai as genai
+from google.generativeai import client as genai_client
+
+# Explicit context caches have a provider-side minimum size; smaller prefixes
+# are sent as a plain system instruction (and still benefit from implicit caching).
+DEFAULT_CACHE_MIN_CHARS = 4000
+DEFAULT_CACHE_TTL_MINUTES = 10
+
+def get_llm_proxies() -> Dict[str, str]:
+    """
+    Proxy for Gemini traffic: GEMINI_PROXY, else the system HTTPS_PROXY / HTTP_PROXY.
+    """
+    proxy = os.getenv("GEMINI_PROXY") or os.getenv("HTTPS_PROXY") or os.getenv("HTTP_PROXY")
+    if not proxy or proxy.lower() == "none":
+        return {}
+    return {"http": proxy, "https": proxy}
+
+def _pin_http_session(client):
+    """
+    Give a Gemini REST client an explicit proxy on its own (pooled) requests
+    session, so it no longer depends on what the process environment holds.
+    """
+    session = getattr(getattr(client, "_transport", None), "_session", None)
+    if session is not None and not getattr(session, "_proxy_pinned", False):
+        session.trust_env = False
+        session.proxies.update(get_llm_proxies())
+        session._proxy_pinned = True
+    return client
+
+class LLMSession:
+    """
+    One ReAct run's conversation with Gemini.
+
+    The run's stable prefix (system prompt + conversation history) is the system
+    instruction; each step is sent as alternating user/model turns. When the prefix
+    is large enough and GEMINI_CONTEXT_CACHE is not 'off', it is uploaded once as an
+    explicit CachedContent so later steps only transmit the turns.
+    """
+    def __init__(self, model_name: str, prefix: str, context_cache: Optional[str] = None):
+        self.model_name = model_name
+        self.prefix = prefix
+        self.context_cache = (context_cache or os.getenv("GEMINI_CONTEXT_CACHE", "auto")).lower()
+        self.cache_min_chars = int(os.getenv("GEMINI_CACHE_MIN_CHARS", DEFAULT_CACHE_MIN_CHARS))
+        self._model = None
+        self._cached_content = None
+
+    @property
+    def uses_context_cache(self) -> bool:
+        return self._cached_content is not None
+
+    def _get_model(self):
+        if self._model is not None:
+            return self._model
+
+        if self.context_cache != "off" and len(self.prefix) >= self.cache_min_chars:
+            try:
+                _pin_http_session(genai_client.get_default_cache_client())
+                self._cached_content = genai.caching.CachedContent.create(
+                    model=self.model_name,
+                    system_instruction=self.prefix,
+                    ttl=datetime.timedelta(minutes=DEFAULT_CACHE_TTL_MINUTES),
+                )
+                self._model = genai.GenerativeModel.from_cached_content(self._cached_content)
+            except Exception as e:
+                # Unsupported model / prefix below the provider minimum: fall back silently
+                print(f"DEBUG: Context cache unavailable, sending prefix inline: {e}")
+                self._cached_content = None
+
+        if self._model is None:
+            self._model = genai.GenerativeModel(self.model_name, system_instruction=self.prefix)
+        # Bind the client now so later genai.configure() calls elsewhere cannot swap it mid-run
+        self._model._client = _pin_http_session(genai_client.get_default_generative_client())
+        return self._model
+
+    def generate_stream(self, contents: List[Dict[str, Any]]):
+        """
+        Yield response text incrementally for the given turns.
+        """
+        response = self._get_model().generate_content(contents, stream=True)
+        for chunk in response:
+            if chunk.parts:
+                yield chunk.text
+
+    def close(self):
+        """Release the provider-side cache (it would otherwise live until its TTL)."""
+        if self._cached_content is not None:
+            try:
+                self._cached_content.delete()
+            except Exception as e:
+                print(f"DEBUG: Failed to delete context cache: {e}")
+            self._cached_content = None
+        self._model = None
@@ -0,0 +1,386 @@
+"""
+Process-pool sandbox for generated code.
+
+Each worker is a separate Python process started with pandas, tushare and the
+tool modules already imported. A worker is leased to one agent run at a time;
+snippets execute under CPU-time / memory limits (POSIX) and a wall-clock
+timeout, and their stdout is streamed back line by line.
+
+Parent and worker talk JSON lines over the worker's stdin/stdout:
+  parent -> worker: init, start(tools), exec(code), reset
+  worker -> parent: ready, out(text), done(stats), error(error_type, message, stats)
+  (stats: variables, tool_cache, tushare_quota)
+
+The run's namespace lives in the worker, so variables persist between snippets.
+"""
+import os
+import sys
+import json
+import time
+import queue
+import atexit
+import importlib
+import threading
+import subprocess
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from ..tools.registry import Tool
+
+try:
+    import resource  # POSIX only; limits are skipped where unavailable
+    import signal
+except ImportError:
+    resource = None
+
+DEFAULT_TOOL_MODULES: Tuple[str, ...] = ("aixiaoliang_agent.tools.stock_data", "aixiaoliang_agent.tools.knowledge_tool")
+DEFAULT_WORKERS = 4
+DEFAULT_TIMEOUT_SECONDS = 300
+DEFAULT_CPU_SECONDS = 120
+DEFAULT_MEMORY_MB = 4096
+STARTUP_TIMEOUT_SECONDS = 120
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+class SandboxError(Exception):
+    """An exception raised by generated code inside a worker (re-created by name)."""
+    def __init__(self, message: str, error_type: str = "Exception"):
+        super().__init__(message)
+        self.error_type = error_type
+
+class SandboxLimitExceeded(Exception):
+    """The snippet hit the wall-clock, CPU or memory limit; its worker is discarded."""
+
+# ---------------------------------------------------------------------------
+# Parent side
+# ---------------------------------------------------------------------------
+
+class _Worker:
+    def __init__(self, tool_modules: Tuple[str, ...], memory_mb: int, rate_share: float = 1.0):
+        env = dict(os.environ)
+        env["TUSHARE_RATE_SHARE"] = str(rate_share)  # Workers split the account's per-minute budget
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [_PROJECT_ROOT, env.get("PYTHONPATH")]))
+        env["PYTHONIOENCODING"] = "utf-8"
+        self.proc = subprocess.Popen(
+            [sys.executable, "-m", "aixiaoliang_agent.agent.sandbox"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, env=env,
+        )
+        self._messages: "queue.Queue" = queue.Queue()
+        self._ready = False
+        threading.Thread(target=self._read, name="sandbox-reader", daemon=True).start()
+        self.send({"type": "init", "tool_modules": list(tool_modules), "memory_mb": memory_mb})
+
+    def _read(self):
+        try:
+            for line in self.proc.stdout:
+                self._messages.put(json.loads(line))
+        except Exception:
+            pass
+        finally:
+            self._messages.put(None)  # EOF: the worker exited
+
+    @property
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def send(self, message: dict):
+        self.proc.stdin.write((json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8"))
+        self.proc.stdin.flush()
+
+    def recv(self, timeout: float) -> Optional[dict]:
+        """Next message, None if the worker exited; raises queue.Empty on timeout."""
+        return self._messages.get(timeout=max(timeout, 0))
+
+    def wait_ready(self, timeout: float = STARTUP_TIMEOUT_SECONDS):
+        if self._ready:
+            return
+        message = self.recv(timeout)
+        if not message or message.get("type") != "ready":
+            raise RuntimeError(f"Sandbox worker failed to start: {message}")
+        self._ready = True
+
+    def kill(self):
+        if self.alive:
+            self.proc.kill()
+        self.proc.wait()
+
+class _SandboxRun:
+    def __init__(self, executor: "SandboxExecutor", worker: _Worker):
+        self.executor = executor
+        self.worker = worker
+        self._variables: List[str] = []
+        self._tool_cache: Dict[str, object] = {}
+        self._quota: Optional[Dict[str, object]] = None
+
+    def execute(self, code: str) -> Iterator[str]:
+        """Yield the snippet's stdout as it is produced; raise ExecutionError on failure."""
+        from .executor import ExecutionError
+        worker = self.worker
+        worker.send({"type": "exec", "code": code, "cpu_seconds": self.executor.cpu_seconds})
+        deadline = time.time() + self.executor.timeout
+        output = []
+        finished = False
+        try:
+            while True:
+                try:
+                    message = worker.recv(deadline - time.time())
+                except queue.Empty:
+                    raise ExecutionError(SandboxLimitExceeded(
+                        f"Wall-clock limit exceeded ({self.executor.timeout}s)"), "".join(output))
+                if message is None:
+                    raise ExecutionError(SandboxLimitExceeded(
+                        "Sandbox worker exited unexpectedly (memory limit?)"), "".join(output))
+                kind = message["type"]
+                if kind == "out":
+                    output.append(message["text"])
+                    yield message["text"]
+                elif kind == "done":
+                    finished = True
+                    self._variables = message.get("variables", [])
+                    self._tool_cache = message.get("tool_cache", {})
+                    self._quota = message.get("tushare_quota")
+                    return
+                elif kind == "error":
+                    finished = True
+                    self._variables = message.get("variables", [])
+                    self._tool_cache = message.get("tool_cache", {})
+                    self._quota = message.get("tushare_quota")
+                    raise ExecutionError(SandboxError(message["message"], message["error_type"]), "".join(output))
+        finally:
+            if not finished:
+                # Timed out, crashed or abandoned mid-snippet: the worker state is unknown
+                worker.kill()
+
+    def variables(self) -> List[str]:
+        """Variables defined so far in this run (as of the last snippet)."""
+        return self._variables
+
+    def tool_cache_stats(self) -> Dict[str, object]:
+        """Tool memo hits/misses of this run (as of the last snippet)."""
+        return self._tool_cache
+
+    def quota_stats(self) -> Optional[Dict[str, object]]:
+        """Tushare calls of this run's session made by its worker."""
+        return self._quota
+
+    def close(self):
+        self.executor._release(self.worker)
+
+class SandboxExecutor:
+    """
+    Pool of warm worker processes. `start_run` leases one worker for the whole
+    agent run (runs wait when all `workers` are leased) and `close` returns it.
+    """
+    def __init__(self, workers: Optional[int] = None, timeout: Optional[float] = None,
+                 cpu_seconds: Optional[int] = None, memory_mb: Optional[int] = None,
+                 tool_modules: Tuple[str, ...] = DEFAULT_TOOL_MODULES):
+        self.workers = workers or int(os.getenv("SANDBOX_WORKERS", DEFAULT_WORKERS))
+        self.timeout = timeout or float(os.getenv("SANDBOX_TIMEOUT", DEFAULT_TIMEOUT_SECONDS))
+        self.cpu_seconds = cpu_seconds if cpu_seconds is not None else int(os.getenv("SANDBOX_CPU_SECONDS", DEFAULT_CPU_SECONDS))
+        self.memory_mb = memory_mb if memory_mb is not None else int(os.getenv("SANDBOX_MEMORY_MB", DEFAULT_MEMORY_MB))
+        self.tool_modules = tool_modules
+        self._idle: List[_Worker] = []
+        self._total = 0
+        self._cond = threading.Condition()
+
+    def _spawn(self) -> _Worker:
+        return _Worker(self.tool_modules, self.memory_mb, rate_share=1.0 / self.workers)
+
+    def warm_up(self):
+        """Start idle workers up to the pool size (startup continues in the background)."""
+        with self._cond:
+            while self._total < self.workers:
+                self._idle.append(self._spawn())
+                self._total += 1
+
+    def _lease(self) -> _Worker:
+        with self._cond:
+            while True:
+                while self._idle:
+                    worker = self._idle.pop()
+                    if worker.alive:
+                        return worker
+                    self._total -= 1
+                if self._total < self.workers:
+                    self._total += 1
+                    break
+                self._cond.wait()
+        try:
+            return self._spawn()
+        except Exception:
+            with self._cond:
+                self._total -= 1
+                self._cond.notify()
+            raise
+
+    def _release(self, worker: _Worker):
+        if worker.alive:
+            try:
+                worker.send({"type": "reset"})
+            except OSError:
+                worker.kill()
+        if not worker.alive:
+            # Replace a killed worker so the pool stays warm
+            try:
+                worker = self._spawn()
+            except Exception as e:
+                print(f"[!] Warn: Failed to respawn sandbox worker: {e}")
+                with self._cond:
+                    self._total -= 1
+                    self._cond.notify()
+                return
+        with self._cond:
+            self._idle.append(worker)
+            self._cond.notify()
+
+    def start_run(self, tools: Dict[str, Tool], session_id: Optional[str] = None) -> _SandboxRun:
+        """
+        Lease a worker for one agent run. Tools are resolved by name inside the
+        worker (from the tool registry of its tool modules).
+        """
+        worker = self._lease()
+        try:
+            worker.wait_ready()
+            worker.send({"type": "start", "tools": list(tools), "session_id": session_id})
+        except Exception:
+            worker.kill()
+            self._release(worker)
+            raise
+        return _SandboxRun(self, worker)
+
+    def shutdown(self):
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._total -= len(idle)
+        for worker in idle:
+            worker.kill()
+
+_EXECUTOR: Optional[SandboxExecutor] = None
+_EXECUTOR_LOCK = threading.Lock()
+
+def get_sandbox_executor() -> SandboxExecutor:
+    """Process-wide sandbox pool, warmed on first use."""
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = SandboxExecutor()
+            _EXECUTOR.warm_up()
+            atexit.register(_EXECUTOR.shutdown)
+        return _EXECUTOR
+
+# ---------------------------------------------------------------------------
+# Worker side
+# ---------------------------------------------------------------------------
+
+class _StreamWriter:
+    """Worker stdout: forwards printed text to the parent, one message per line."""
+    def __init__(self, send: Callable[[dict], None]):
+        self._send = send
+        self._buffer = ""
+        self._lock = threading.Lock()
+
+    def write(self, s: str) -> int:
+        with self._lock:
+            self._buffer += s
+            if "\n" in self._buffer:
+                head, _, self._buffer = self._buffer.rpartition("\n")
+                self._send({"type": "out", "text": head + "\n"})
+        return len(s)
+
+    def flush(self):
+        with self._lock:
+            if self._buffer:
+                self._send({"type": "out", "text": self._buffer})
+                self._buffer = ""
+
+    def isatty(self):
+        return False
+
+def _cpu_used() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+def _set_cpu_budget(seconds: Optional[int]):
+    """Allow `seconds` more CPU time from now (None/0 lifts the limit)."""
+    if resource is None:
+        return
+    hard = resource.getrlimit(resource.RLIMIT_CPU)[1]
+    soft = hard if not seconds else int(_cpu_used() + seconds) + 1
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+def _on_cpu_limit(signum, frame):
+    raise SandboxLimitExceeded("CPU time limit exceeded")
+
+def _resolve_tools(names: List[str], modules: list) -> Dict[str, Tool]:
+    from ..tools.registry import default_registry
+    tools = {}
+    for name in names:
+        tool = default_registry.get_tool(name)
+        if tool is None:
+            func = next((getattr(m, name) for m in modules if hasattr(m, name)), None)
+            if func is None:
+                print(f"[!] Warn: Sandbox tool not found: {name}", file=sys.stderr)
+                continue
+            tool = Tool(name, "", func, getattr(func, "cache_ttl", None))
+        tools[name] = tool
+    return tools
+
+def _worker_main():
+    # Keep the protocol channel private; stray writes to fd 1 go to stderr instead
+    protocol = os.fdopen(os.dup(1), "w", encoding="utf-8")
+    os.dup2(2, 1)
+    send_lock = threading.Lock()
+
+    def send(message: dict):
+        with send_lock:
+            protocol.write(json.dumps(message, ensure_ascii=False) + "\n")
+            protocol.flush()
+
+    init = json.loads(sys.stdin.readline())
+    import pandas, numpy  # Warm imports
+    from .executor import ToolMemo, build_namespace, describe_namespace, exec_code
+    from ..tools.rate_limiter import get_tushare_limiter, quota_session
+    modules = [importlib.import_module(name) for name in init["tool_modules"]]
+
+    if resource is not None:
+        if init.get("memory_mb"):
+            limit = init["memory_mb"] * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, resource.getrlimit(resource.RLIMIT_AS)[1]))
+        signal.signal(signal.SIGXCPU, _on_cpu_limit)
+
+    stdout = _StreamWriter(send)
+    sys.stdout = stdout
+    namespace: Dict[str, object] = {}
+    hidden: set = set()
+    memo = ToolMemo()
+    session_id = None
+    send({"type": "ready"})
+
+    for line in sys.stdin:
+        message = json.loads(line)
+        kind = message["type"]
+        if kind == "start":
+            memo = ToolMemo()
+            session_id = message.get("session_id")
+            namespace = build_namespace(_resolve_tools(message["tools"], modules), memo)
+            hidden = set(namespace)
+        elif kind == "reset":
+            namespace, hidden, memo, session_id = {}, set(), ToolMemo(), None
+        elif kind == "exec":
+            try:
+                _set_cpu_budget(message.get("cpu_seconds"))
+                with quota_session(session_id):
+                    exec_code(message["code"], namespace)
+                result = {"type": "done"}
+            except BaseException as e:
+                result = {"type": "error", "error_type": type(e).__name__, "message": str(e) or type(e).__name__}
+            finally:
+                _set_cpu_budget(None)
+            stdout.flush()
+            result["variables"] = describe_namespace(namespace, hidden)
+            result["tool_cache"] = memo.stats()
+            result["tushare_quota"] = get_tushare_limiter().session_stats(session_id) if session_id else None
+            send(result)
+
+if __name__ == "__main__":
+    _worker_main()
@@ -0,0 +1,121 @@
+import os
+import json
+import queue
+import threading
+from typing import Any, Dict, List, Optional
+
+class _BackgroundAppender:
+    """Single daemon thread that appends text blocks to files, off the request path."""
+    def __init__(self):
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="session-log-writer", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            path, text, done = self._queue.get()
+            try:
+                _append(path, text)
+            except Exception as e:
+                print(f"DEBUG: Failed to write session log: {e}")
+            finally:
+                if done is not None:
+                    done.set()
+
+    def submit(self, path: str, text: str, wait: bool = False):
+        done = threading.Event() if wait else None
+        self._queue.put((path, text, done))
+        if done is not None:
+            done.wait()
+
+_APPENDER: Optional[_BackgroundAppender] = None
+_APPENDER_LOCK = threading.Lock()
+
+def _get_appender() -> _BackgroundAppender:
+    global _APPENDER
+    with _APPENDER_LOCK:
+        if _APPENDER is None:
+            _APPENDER = _BackgroundAppender()
+        return _APPENDER
+
+def _append(path: str, text: str):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(text)
+
+class SessionLogWriter:
+    """
+    Append-only JSONL event log: one line per event, buffered in memory and
+    written at step boundaries (`flush`). Cost is linear in what is logged;
+    nothing already written is ever rewritten.
+
+    With background=True (default: SESSION_LOG_BACKGROUND, on) the file I/O
+    happens on a shared writer thread.
+    """
+    def __init__(self, path: str, background: Optional[bool] = None):
+        self.path = path
+        if background is None:
+            background = os.getenv("SESSION_LOG_BACKGROUND", "1") != "0"
+        self.background = background
+        self._buffer: List[str] = []
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def write(self, event: Dict[str, Any]):
+        line = json.dumps(event, ensure_ascii=False, default=str)
+        with self._lock:
+            self._buffer.append(line)
+
+    def flush(self, wait: bool = False):
+        with self._lock:
+            if not self._buffer:
+                return
+            text = "\n".join(self._buffer) + "\n"
+            self._buffer = []
+        if self.background:
+            _get_appender().submit(self.path, text, wait=wait)
+        else:
+            try:
+                _append(self.path, text)
+            except Exception as e:
+                print(f"DEBUG: Failed to write session log: {e}")
+
+    def close(self):
+        self.flush(wait=True)
+
+def read_session(path: str) -> List[Dict[str, Any]]:
+    """
+    Reconstruct the runs recorded in a session log, oldest first:
+    [{"timestamp", "query", "steps": [...], **run_end fields}, ...]
+
+    Also accepts the legacy format (one indented JSON object per file). An
+    undecodable line after the first (e.g. torn by a crash mid-append) is
+    skipped with a warning.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+
+    runs: List[Dict[str, Any]] = []
+    first = True
+    for number, line in enumerate(text.splitlines(), 1):
+        if not line.strip():
+            continue
+        try:
+            event = json.loads(line)
+        except json.JSONDecodeError:
+            if first:
+                return [json.loads(text)]  # Legacy whole-file JSON
+            print(f"[!] Warn: Skipping unreadable line {number} of {path}")
+            continue
+        if first and "event" not in event:
+            return [event]  # Legacy JSON written on a single line
+        first = False
+        kind = event.pop("event", None)
+        if kind == "run_start":
+            runs.append({"timestamp": event.get("timestamp"), "query": event.get("query"), "steps": []})
+        elif kind == "step":
+            if not runs:
+                runs.append({"timestamp": None, "query": None, "steps": []})
+            runs[-1]["steps"].append(event)
+        elif kind == "run_end" and runs:
+            runs[-1].update(event)
+    return runs
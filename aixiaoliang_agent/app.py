@@ -7,6 +7,7 @@ from dotenv import load_dotenv
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from aixiaoliang_agent.agent.code_agent import CodeAgent
+from aixiaoliang_agent.agent.agent_pool import AgentPool, DEFAULT_MAX_SESSIONS
 from aixiaoliang_agent.tools.registry import default_registry
 import aixiaoliang_agent.tools.stock_data
 import aixiaoliang_agent.tools.knowledge_tool
@@ -19,7 +20,8 @@ def create_agent():
     model_name = os.getenv("MODEL_NAME", "gemini-3-pro-preview")
     return CodeAgent(model_name=model_name, tools=tools)
 
-agent = create_agent()
+# One agent per browser session: runs keep their state on the agent, so sessions must not share one
+agent_pool = AgentPool(create_agent, max_sessions=int(os.getenv("APP_MAX_SESSIONS", DEFAULT_MAX_SESSIONS)))
 
 
 import time
@@ -80,7 +82,7 @@ def predict(message, history, session_id):
         if bot_msg: formatted_history.append(f"Assistant: {bot_msg}")
         
     # Use 'full' mode so CodeAgent manages the buffer and replacement
-    for buffer in agent.run(message, history=formatted_history, stream_mode="full", session_id=session_id):
+    for buffer in agent_pool.run(session_id, message, history=formatted_history, stream_mode="full"):
         yield buffer
 
 css = """
@@ -162,6 +164,11 @@ if __name__ == "__main__":
         port = int(os.getenv("APP_PORT", 7860))
         print(f"[*] Starting AiXiaoliang on port {port}...")
         
+        # Concurrent runs across sessions; further requests wait in the queue
+        demo.queue(
+            default_concurrency_limit=int(os.getenv("APP_CONCURRENCY", 8)),
+            max_size=int(os.getenv("APP_QUEUE_SIZE", 64)),
+        )
         demo.launch(
             server_name="127.0.0.1", 
             server_port=port, 
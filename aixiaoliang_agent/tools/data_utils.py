@@ -1,5 +1,13 @@
 
-from typing import Dict, Any, List
+import copy
+from typing import Dict, Any, List, Optional
+import pandas as pd
+
+# Payload layouts for tabular envelope data
+DATA_FORMATS = ('records', 'frame', 'columns', 'arrow')
+
+# Envelopes with more rows than this print as a bounded preview
+REPR_MAX_ROWS = 100
 
 def normalize_stock_record(record: Dict[str, Any]) -> Dict[str, Any]:
     """
@@ -28,22 +36,198 @@ def normalize_stock_records(records: List[Dict[str, Any]]) -> List[Dict[str, Any
     """
     return [normalize_stock_record(r) for r in records]
 
-def create_envelope(data: Any, status: str = "success", error: str = None, meta: Dict[str, Any] = None) -> Dict[str, Any]:
+def normalize_stock_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Frame counterpart of `normalize_stock_record`: add the 'code' alias as one
+    new column in place instead of copying every row.
+    Mutates and returns `df`; callers pass frames they own.
+    """
+    if 'ts_code' in df.columns and 'code' not in df.columns:
+        df['code'] = df['ts_code']
+    return df
+
+def frame_payload(df: pd.DataFrame, data_format: str = 'records') -> Any:
+    """
+    Convert a tool's result frame into the requested payload layout:
+    - 'records': list of dicts (default, what most agent code expects)
+    - 'frame':   the pandas DataFrame itself (no materialization)
+    - 'columns': dict of column name -> NumPy array
+    - 'arrow':   pyarrow.Table
+    """
+    if data_format not in DATA_FORMATS:
+        raise ValueError(f"data_format must be one of {DATA_FORMATS}, got '{data_format}'")
+    df = normalize_stock_frame(df)
+    if data_format == 'frame':
+        return df
+    if data_format == 'columns':
+        return {col: df[col].to_numpy() for col in df.columns}
+    if data_format == 'arrow':
+        import pyarrow as pa
+        return pa.Table.from_pandas(df, preserve_index=False)
+    return df.to_dict(orient='records')
+
+def copy_payload(value: Any) -> Any:
+    """Copy of a tool result that shares no mutable data with `value`."""
+    if isinstance(value, Envelope):
+        return value.clone()
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy()
+    try:
+        return copy.deepcopy(value)
+    except Exception:
+        return value
+
+class Envelope(dict):
+    """
+    Tool response envelope (Rich Signals Pattern) with lazily materialized data.
+
+    A plain dict {'status', 'data', 'meta', 'error'}: `json.dumps(res)`,
+    `res.copy()` and `res['meta'] = ...` work as on any dict. When built from
+    a DataFrame, `data` is only converted to its payload layout on first
+    access (indexing, `get`, `items`, `copy`, JSON encoding). `repr` is the
+    full dict for small payloads and a bounded preview for large ones.
+    """
+    _KEYS = ("status", "data", "meta", "error")
+
+    def __init__(self, data: Any = None, status: str = "success", error: str = None,
+                 meta: Dict[str, Any] = None, frame: Optional[pd.DataFrame] = None, data_format: str = 'records'):
+        super().__init__(status=status, data=data, meta=meta or {}, error=error)
+        self._frame = frame
+        self._format = data_format
+
+    def _materialize(self):
+        if self._frame is not None:
+            dict.__setitem__(self, 'data', frame_payload(self._frame, self._format))
+            self._frame = None
+
+    @property
+    def status(self) -> str:
+        return dict.__getitem__(self, 'status')
+
+    @property
+    def meta(self) -> Dict[str, Any]:
+        return dict.__getitem__(self, 'meta')
+
+    @property
+    def error(self) -> Optional[str]:
+        return dict.__getitem__(self, 'error')
+
+    @property
+    def data(self) -> Any:
+        return self['data']
+
+    @property
+    def materialized(self) -> bool:
+        return self._frame is None
+
+    def row_count(self) -> Optional[int]:
+        if self._frame is not None:
+            return len(self._frame)
+        data = dict.get(self, 'data')
+        if isinstance(data, (list, tuple, pd.DataFrame)):
+            return len(data)
+        return None
+
+    # Every way of reading `data` goes through _materialize first
+    def __getitem__(self, key: str) -> Any:
+        if key == 'data':
+            self._materialize()
+        return super().__getitem__(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key == 'data':
+            self._materialize()
+        return super().get(key, default)
+
+    def pop(self, key: str, *default) -> Any:
+        if key == 'data':
+            self._materialize()
+        return super().pop(key, *default)
+
+    def __setitem__(self, key: str, value: Any):
+        if key == 'data':
+            self._frame = None
+        super().__setitem__(key, value)
+
+    def items(self):
+        self._materialize()
+        return super().items()
+
+    def values(self):
+        self._materialize()
+        return super().values()
+
+    def __iter__(self):
+        # Overriding __iter__ makes dict(res) / {**res} read through __getitem__
+        return super().__iter__()
+
+    def __eq__(self, other: Any) -> bool:
+        self._materialize()
+        return super().__eq__(other)
+
+    __hash__ = None
+
+    def copy(self) -> Dict[str, Any]:
+        return dict(self.items())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: self[key] for key in self._KEYS}
+
+    def clone(self) -> "Envelope":
+        """Independent copy: the caller may mutate its data (and meta) without touching this one."""
+        if self._frame is not None:
+            return Envelope(status=self.status, error=self.error, meta=copy.deepcopy(self.meta),
+                            frame=self._frame.copy(), data_format=self._format)
+        return Envelope(copy_payload(dict.get(self, 'data')), status=self.status, error=self.error,
+                        meta=copy.deepcopy(self.meta))
+
+    def preview(self, limit: Optional[int] = None, rows: int = 3) -> str:
+        """
+        Short description without materializing the payload: status, size,
+        meta, error and the first `rows` rows, cut to `limit` characters.
+        """
+        count = self.row_count()
+        if count is None:
+            text = repr(self.to_dict())
+        else:
+            if self._frame is not None:
+                head = self._frame.head(rows).to_dict(orient='records')
+            else:
+                data = dict.get(self, 'data')
+                head = data.head(rows).to_dict(orient='records') if isinstance(data, pd.DataFrame) else list(data[:rows])
+            more = f", ... {count - len(head)} more" if count > len(head) else ""
+            text = (f"{{'status': {self.status!r}, 'rows': {count}, 'meta': {self.meta!r}, "
+                    f"'error': {self.error!r}, 'data': {head!r}{more}}}")
+        if limit and len(text) > limit:
+            text = text[:limit] + "... (truncated)"
+        return text
+
+    def __repr__(self) -> str:
+        count = self.row_count()
+        if count is None or count <= REPR_MAX_ROWS:
+            return repr(self.to_dict())
+        return self.preview(rows=5)
+
+def create_envelope(data: Any, status: str = "success", error: str = None, meta: Dict[str, Any] = None,
+                    data_format: str = 'records') -> Envelope:
     """
     Create a standardized response envelope for tools (Rich Signals Pattern).
     
     Args:
-        data: The actual payload (List, Dict, etc.) or None.
+        data: The actual payload (List, Dict, DataFrame etc.) or None.
         status: 'success', 'empty', or 'error'.
         error: Error message if status is 'error'.
         meta: Additional metadata (reason, hint, suggestion).
+        data_format: Layout for DataFrame data, see `frame_payload`.
+            Non-default layouts are recorded in meta['format'].
     
     Returns:
-        Dict: Standardized JSON-like response.
-    """
-    return {
-        "status": status,
-        "data": data,
-        "meta": meta or {},
-        "error": error
-    }
+        Envelope: Standardized response dict; DataFrame data is materialized on first access.
+    """
+    if isinstance(data, pd.DataFrame):
+        if data_format not in DATA_FORMATS:
+            raise ValueError(f"data_format must be one of {DATA_FORMATS}, got '{data_format}'")
+        if data_format != 'records':
+            meta = {**(meta or {}), "format": data_format}
+        return Envelope(status=status, error=error, meta=meta, frame=data, data_format=data_format)
+    return Envelope(data, status=status, error=error, meta=meta)
@@ -0,0 +1,60 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+
+# Unit conversions
+WAN_YUAN = 10000  # 万元 -> 元
+
+@dataclass
+class DerivedMetric:
+    """
+    A column computed as `numerator * scale / denominator`, vectorized over the frame.
+    Rows with a zero or missing denominator get NaN.
+    """
+    name: str
+    numerator: str
+    denominator: str
+    scale: float = 1.0
+    description: str = ""
+
+class DerivedMetricRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, DerivedMetric] = {}
+
+    def register(self, metric: DerivedMetric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def get_metrics(self) -> List[DerivedMetric]:
+        return list(self._metrics.values())
+
+    def apply(self, df: pd.DataFrame, names: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Add every applicable derived column to `df` (in place) and return it.
+        Metrics whose source columns are absent are skipped.
+        """
+        for metric in self.get_metrics():
+            if names is not None and metric.name not in names:
+                continue
+            if metric.numerator not in df.columns or metric.denominator not in df.columns:
+                continue
+            num = pd.to_numeric(df[metric.numerator], errors='coerce').to_numpy(dtype=float) * metric.scale
+            den = pd.to_numeric(df[metric.denominator], errors='coerce').to_numpy(dtype=float)
+            valid = np.isfinite(den) & (den != 0)
+            out = np.full(len(df), np.nan)
+            np.divide(num, den, out=out, where=valid)
+            df[metric.name] = out
+        return df
+
+# Global registry instance
+default_derived_metrics = DerivedMetricRegistry()
+register_derived_metric = default_derived_metrics.register
+
+# total_mv is in 10k (万元); the derived values are in Yuan.
+register_derived_metric(DerivedMetric(
+    "total_revenue_ttm", "total_mv", "ps_ttm", WAN_YUAN,
+    "Revenue (TTM, 元) = total market value / PS (TTM)"))
+register_derived_metric(DerivedMetric(
+    "net_profit_ttm", "total_mv", "pe_ttm", WAN_YUAN,
+    "Net profit (TTM, 元) = total market value / PE (TTM)"))
@@ -0,0 +1,99 @@
+import os
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import pandas as pd
+
+def get_max_workers() -> int:
+    return int(os.getenv("TUSHARE_MAX_WORKERS", "4"))
+
+def _run_wave(fetch_fn, chunks, max_workers):
+    """
+    Fetch every chunk concurrently. Returns [(chunk, DataFrame or Exception)] in chunk order.
+    """
+    outcomes = []
+    with ThreadPoolExecutor(max_workers=max_workers or get_max_workers()) as pool:
+        # Workers inherit the caller's context (e.g. the run's stdout capture)
+        futures = [pool.submit(contextvars.copy_context().run, fetch_fn, chunk) for chunk in chunks]
+        for chunk, future in zip(chunks, futures):
+            try:
+                outcomes.append((chunk, future.result()))
+            except Exception as e:
+                outcomes.append((chunk, e))
+    return outcomes
+
+def fetch_complete(fetch_fn: Callable[[List[str]], pd.DataFrame], codes: List[str], chunk_size: int = 50,
+                   min_chunk_size: int = 1, key: str = 'ts_code',
+                   max_workers: Optional[int] = None) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    Batch fetch with a completeness check: `fetch_fn(chunk)` runs for every
+    `chunk_size` slice of `codes` with bounded concurrency. Requests made through
+    the `pro` client queue on the process-wide TushareLimiter, so each wave runs
+    as fast as the points tier allows.
+
+    Tushare silently drops codes from comma-joined `ts_code` requests (see
+    analyze_drop_rate.py). After each wave the returned codes are diffed against
+    the requested ones; only the missing codes (or a failed chunk's codes) are
+    re-queued, in chunks half the size of the one they came from, until chunks
+    reach `min_chunk_size`. A retried chunk that returns none of its codes stops
+    the bisection for those codes: they genuinely have no data for this query,
+    and splitting further would only burn quota.
+
+    Returns:
+        (DataFrame of all rows, coverage dict for the envelope `meta`)
+    """
+    wave = [codes[i:i + chunk_size] for i in range(0, len(codes), chunk_size)]
+    first_wave = True
+
+    frames = []
+    returned = set()
+    unresolved = []
+    requests_made = 0
+    errors = 0
+    retry_waves = 0
+
+    while wave:
+        requests_made += len(wave)
+        next_wave = []
+        for chunk, outcome in _run_wave(fetch_fn, wave, max_workers):
+            if isinstance(outcome, Exception):
+                errors += 1
+                print(f"[!] Warn: Chunk of {len(chunk)} codes failed: {outcome}")
+                missing = chunk
+            else:
+                got = set()
+                if outcome is not None and not outcome.empty:
+                    frames.append(outcome)
+                    got = set(outcome[key])
+                    returned |= got
+                missing = [c for c in chunk if c not in got]
+
+            if not missing:
+                continue
+            no_progress = not first_wave and len(missing) == len(chunk) and not isinstance(outcome, Exception)
+            if len(chunk) <= min_chunk_size or no_progress:
+                unresolved.extend(missing)
+                continue
+            # Adaptive bisection: retry only the gaps, with smaller requests
+            size = max(min_chunk_size, len(chunk) // 2)
+            next_wave.extend(missing[i:i + size] for i in range(0, len(missing), size))
+
+        if next_wave:
+            retry_waves += 1
+            print(f"[*] Re-fetching {sum(len(c) for c in next_wave)} missing codes in {len(next_wave)} smaller chunks...")
+        wave = next_wave
+        first_wave = False
+
+    df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    requested = len(set(codes))
+    coverage = {
+        "requested": requested,
+        "returned": len(returned),
+        "missing": len(unresolved),
+        "coverage": round(len(returned) / requested, 4) if requested else 1.0,
+        "requests": requests_made,
+        "retry_waves": retry_waves,
+        "failed_requests": errors,
+        "missing_sample": sorted(unresolved)[:20],
+    }
+    return df, coverage
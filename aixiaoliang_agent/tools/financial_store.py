@@ -0,0 +1,105 @@
+import datetime
+import threading
+from typing import Any, Dict, List, Tuple
+import pandas as pd
+from .local_store import PartitionedStore
+from .fetch_engine import fetch_complete
+
+# One partition per reporting period: rows keyed by (period, ts_code)
+_STORE = PartitionedStore("fina_indicator")
+# Codes that returned no data for a period, with the date they were last checked
+_MISSING = PartitionedStore("fina_indicator_missing")
+_LOCK = threading.Lock()
+# Periods with a read -> fetch -> write pass in progress; other callers wait, then re-read
+_INFLIGHT: Dict[str, threading.Event] = {}
+
+# Reports for a quarter are all due well within this window; after it, gaps are final.
+_DISCLOSURE_DAYS = 180
+
+def _today_key() -> str:
+    return datetime.date.today().strftime("%Y%m%d")
+
+def _missing_is_final(period: str) -> bool:
+    try:
+        period_end = datetime.datetime.strptime(period, "%Y%m%d").date()
+    except ValueError:
+        return False
+    return (datetime.date.today() - period_end).days > _DISCLOSURE_DAYS
+
+def load_financial_indicator(pro, period: str, codes: List[str], fields: str,
+                             chunk_size: int = 50) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    Market-wide fina_indicator rows for `period`, served from the local store.
+
+    Only codes that are neither stored nor known to be missing (checked today, or
+    the disclosure window has closed) are fetched from Tushare; new rows are merged
+    back into the period partition.
+
+    Concurrent calls for the same period run one at a time, so the same gaps are
+    never fetched twice and one caller's write cannot drop another's rows.
+
+    Returns:
+        (DataFrame limited to `codes`, coverage dict for the envelope `meta`)
+    """
+    while True:
+        with _LOCK:
+            waiter = _INFLIGHT.get(period)
+            if waiter is None:
+                _INFLIGHT[period] = threading.Event()
+                break
+        waiter.wait()
+
+    try:
+        return _load_period(pro, period, codes, fields, chunk_size)
+    finally:
+        with _LOCK:
+            _INFLIGHT.pop(period).set()
+
+def _load_period(pro, period: str, codes: List[str], fields: str,
+                 chunk_size: int) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    with _LOCK:
+        stored = _STORE.read(period)
+        if stored is None:
+            stored = pd.DataFrame(columns=fields.split(','))
+        missing = _MISSING.read(period)
+        if missing is None:
+            missing = pd.DataFrame(columns=['ts_code', 'checked'])
+
+    have = set(stored['ts_code'])
+    if _missing_is_final(period):
+        known_missing = set(missing['ts_code'])
+    else:
+        known_missing = set(missing.loc[missing['checked'] == _today_key(), 'ts_code'])
+    gaps = [c for c in codes if c not in have and c not in known_missing]
+
+    coverage = {"requested": len(codes), "local": len(have.intersection(codes)), "fetched": 0, "requests": 0}
+    if gaps:
+        print(f"[*] Back-filling financials for period {period} ({len(gaps)} of {len(codes)} stocks not cached)...")
+        fresh, fetch_coverage = fetch_complete(
+            lambda chunk: pro.fina_indicator(ts_code=",".join(chunk), period=period, fields=fields),
+            gaps, chunk_size=chunk_size
+        )
+        coverage.update({k: fetch_coverage[k] for k in ("requests", "retry_waves", "failed_requests")})
+        coverage["fetched"] = fetch_coverage["returned"]
+
+        with _LOCK:
+            if not fresh.empty:
+                stored = pd.concat([stored, fresh], ignore_index=True) if not stored.empty else fresh
+                _STORE.write(period, stored)
+            # Failed requests say nothing about whether data exists; only record clean misses.
+            if not fetch_coverage["failed_requests"]:
+                got = set(fresh['ts_code']) if not fresh.empty else set()
+                newly_missing = pd.DataFrame({'ts_code': [c for c in gaps if c not in got]})
+                newly_missing['checked'] = _today_key()
+                missing = pd.concat([missing[~missing['ts_code'].isin(newly_missing['ts_code'])], newly_missing],
+                                    ignore_index=True)
+                _MISSING.write(period, missing)
+
+    result = stored[stored['ts_code'].isin(codes)].reset_index(drop=True)
+    returned = result['ts_code'].nunique()
+    coverage.update({
+        "returned": returned,
+        "missing": len(codes) - returned,
+        "coverage": round(returned / len(codes), 4) if codes else 1.0,
+    })
+    return result, coverage
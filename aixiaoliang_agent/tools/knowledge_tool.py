@@ -1,11 +1,11 @@
 import os
 import google.generativeai as genai
-from .registry import register_tool
+from .registry import register_tool, CACHE_FOREVER
 from dotenv import load_dotenv
 
 load_dotenv()
 
-@register_tool(description="Search the Data Dictionary for correct field names and Tool usage. Use this BEFORE writing stock data code.")
+@register_tool(description="Search the Data Dictionary for correct field names and Tool usage. Use this BEFORE writing stock data code.", cache_ttl=CACHE_FOREVER)
 def search_knowledge(query: str) -> str:
     """
     Retrieves information from the Project Data Dictionary (knowledge/data_dictionary.md).
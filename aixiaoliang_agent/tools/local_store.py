@@ -0,0 +1,70 @@
+import os
+import uuid
+from typing import List, Optional
+import pandas as pd
+
+def get_cache_dir() -> str:
+    """
+    Root directory for all on-disk data caches (override with DATA_CACHE_DIR).
+    """
+    return os.getenv("DATA_CACHE_DIR", "data_cache")
+
+class PartitionedStore:
+    """
+    A directory of Parquet files, one file per partition key (a date, a period, ...).
+
+    Layout: <DATA_CACHE_DIR>/<name>/<key>.parquet
+    Writes are atomic (temp file + rename) so concurrent readers never see half a file.
+    """
+    def __init__(self, name: str):
+        self.name = name
+
+    @property
+    def root(self) -> str:
+        return os.path.join(get_cache_dir(), self.name)
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, f"{key}.parquet")
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self.path(key))
+
+    def keys(self) -> List[str]:
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(f[:-len(".parquet")] for f in os.listdir(self.root) if f.endswith(".parquet"))
+
+    def read(self, key: str, columns: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+        """
+        Read a partition, or None if it is missing or unreadable.
+        """
+        path = self.path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            return pd.read_parquet(path, columns=columns, memory_map=True)
+        except Exception as e:
+            print(f"[!] Warn: Failed to read cache {path}: {e}")
+            return None
+
+    def write(self, key: str, df: pd.DataFrame):
+        os.makedirs(self.root, exist_ok=True)
+        path = self.path(key)
+        tmp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+        try:
+            df.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"[!] Warn: Failed to write cache {path}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def prune(self, keep: int):
+        """
+        Delete all but the newest `keep` partitions (by key order).
+        """
+        for key in self.keys()[:-keep]:
+            try:
+                os.remove(self.path(key))
+            except OSError:
+                pass
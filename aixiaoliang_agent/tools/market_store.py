@@ -0,0 +1,160 @@
+import os
+import datetime
+import threading
+from zoneinfo import ZoneInfo
+from typing import Callable, Dict, List, Optional, Tuple
+import pandas as pd
+from .local_store import PartitionedStore
+
+# Exchange clock: trade dates and the hours below are Beijing time, whatever the host's zone
+MARKET_TZ = ZoneInfo("Asia/Shanghai")
+# Tushare publishes daily / daily_basic between 15:00 and ~17:00 (Beijing time).
+# A partition written after this hour on (or after) its trade date is final.
+_SETTLE_HOUR = 18
+# Bars for a trade date cannot exist before the market closes
+_CLOSE_HOUR = 15
+# Calendar days of trade_cal fetched to find the latest trade date (covers the Spring Festival break)
+_CALENDAR_DAYS = 20
+
+_STORES: Dict[str, PartitionedStore] = {}
+
+def get_market_store(api_name: str) -> PartitionedStore:
+    if api_name not in _STORES:
+        _STORES[api_name] = PartitionedStore(api_name)
+    return _STORES[api_name]
+
+def _is_final(store: PartitionedStore, trade_date: str) -> bool:
+    try:
+        day = datetime.datetime.strptime(trade_date, "%Y%m%d").replace(tzinfo=MARKET_TZ)
+    except ValueError:
+        return False
+    settle = day + datetime.timedelta(hours=_SETTLE_HOUR)
+    written = datetime.datetime.fromtimestamp(os.path.getmtime(store.path(trade_date)), tz=MARKET_TZ)
+    return written >= settle
+
+def load_cross_section(api_name: str, trade_date: str, fetch_fn: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+    """
+    Full-market snapshot of `api_name` for `trade_date`, one Parquet partition per date.
+
+    Settled partitions are read locally (memory-mapped, no network). A date that
+    has not settled yet (today, or stored before the close was published) is
+    re-fetched and its partition overwritten; if that fetch fails the stored copy is served.
+    Every snapshot loaded here also feeds the in-process cross-section index.
+    """
+    store = get_market_store(api_name)
+    stored = store.exists(trade_date)
+    if stored and _is_final(store, trade_date):
+        df = store.read(trade_date)
+        if df is not None:
+            _INDEX.update(api_name, trade_date, df)
+            return df
+
+    try:
+        df = fetch_fn()
+    except Exception:
+        fallback = store.read(trade_date) if stored else None
+        if fallback is None:
+            raise  # Nothing usable stored (missing or unreadable partition)
+        print(f"[!] Warn: {api_name} refresh for {trade_date} failed, serving stored copy.")
+        return fallback
+
+    if not df.empty:
+        store.write(trade_date, df)
+        _INDEX.update(api_name, trade_date, df)
+    return df
+
+class CrossSectionIndex:
+    """
+    The newest loaded snapshot of each cross-section API, indexed by ts_code,
+    so single-stock questions are answered from memory once the day's
+    snapshot has been loaded.
+    """
+    def __init__(self):
+        self._snapshots: Dict[str, Tuple[str, pd.DataFrame]] = {}
+        self._lock = threading.Lock()
+
+    def update(self, api_name: str, trade_date: str, df: pd.DataFrame):
+        if df.empty or 'ts_code' not in df.columns:
+            return
+        with self._lock:
+            current = self._snapshots.get(api_name)
+            if current is not None and current[0] > trade_date:
+                return
+        indexed = df.drop_duplicates('ts_code').set_index('ts_code', drop=False)
+        with self._lock:
+            current = self._snapshots.get(api_name)
+            if current is None or current[0] <= trade_date:
+                self._snapshots[api_name] = (trade_date, indexed)
+
+    def lookup(self, api_name: str, trade_date: str, ts_code: str) -> Optional[pd.Series]:
+        """The stock's row in the `trade_date` snapshot, or None if that snapshot is not loaded."""
+        with self._lock:
+            snapshot = self._snapshots.get(api_name)
+        if snapshot is None or snapshot[0] != trade_date:
+            return None
+        df = snapshot[1]
+        if ts_code not in df.index:
+            return None
+        return df.loc[ts_code].copy()
+
+    def trade_date(self, api_name: str) -> Optional[str]:
+        with self._lock:
+            snapshot = self._snapshots.get(api_name)
+        return snapshot[0] if snapshot else None
+
+    def clear(self):
+        with self._lock:
+            self._snapshots.clear()
+
+_INDEX = CrossSectionIndex()
+
+def get_cross_section_index() -> CrossSectionIndex:
+    return _INDEX
+
+_CALENDAR: Dict[str, List[str]] = {}
+_CALENDAR_LOCK = threading.Lock()
+
+def _open_dates(pro, today: str) -> List[str]:
+    """SSE open dates of the last few weeks up to `today`, fetched once per day."""
+    with _CALENDAR_LOCK:
+        if today in _CALENDAR:
+            return _CALENDAR[today]
+    start = (datetime.datetime.strptime(today, "%Y%m%d") - datetime.timedelta(days=_CALENDAR_DAYS)).strftime("%Y%m%d")
+    cal = pro.trade_cal(exchange='SSE', start_date=start, end_date=today, is_open='1')
+    if 'is_open' in cal.columns:
+        cal = cal[cal['is_open'].astype(str) == '1']
+    dates = sorted(cal['cal_date'].astype(str))
+    with _CALENDAR_LOCK:
+        _CALENDAR.clear()
+        _CALENDAR[today] = dates
+    return dates
+
+def latest_trade_date(pro, now: Optional[datetime.datetime] = None) -> Optional[str]:
+    """
+    Trade date of the newest daily data that can exist at `now` (any zone;
+    naive means host-local), per the trade calendar: today in Beijing once the
+    market has closed, else the previous open date.
+    """
+    now = (now or datetime.datetime.now(MARKET_TZ)).astimezone(MARKET_TZ)
+    today = now.strftime("%Y%m%d")
+    dates = [d for d in _open_dates(pro, today) if d <= today]
+    if dates and dates[-1] == today and now.hour < _CLOSE_HOUR:
+        dates = dates[:-1]
+    return dates[-1] if dates else None
+
+def lookup_latest(pro, api_name: str, ts_code: str) -> Optional[pd.Series]:
+    """
+    The stock's row from the latest trade date's `api_name` snapshot, if that
+    snapshot is loaded in this process or settled in the local store; None means
+    the caller should ask Tushare.
+    """
+    trade_date = latest_trade_date(pro)
+    if trade_date is None:
+        return None
+    if _INDEX.trade_date(api_name) != trade_date:
+        store = get_market_store(api_name)
+        if store.exists(trade_date) and _is_final(store, trade_date):
+            df = store.read(trade_date)
+            if df is not None:
+                _INDEX.update(api_name, trade_date, df)
+    return _INDEX.lookup(api_name, trade_date, ts_code)
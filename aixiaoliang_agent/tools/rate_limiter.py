@@ -0,0 +1,202 @@
+import os
+import time
+import threading
+import contextvars
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+# Tushare per-minute call limits by account points tier
+POINTS_TIER_LIMITS = {
+    120: 50,
+    2000: 200,
+    5000: 500,
+    10000: 1000,
+}
+
+def get_rate_per_min() -> int:
+    """
+    Per-minute call budget for our account.
+    TUSHARE_RATE_PER_MIN wins; otherwise derived from TUSHARE_POINTS (default 2000).
+    """
+    explicit = os.getenv("TUSHARE_RATE_PER_MIN")
+    if explicit:
+        return int(explicit)
+    points = int(os.getenv("TUSHARE_POINTS", "2000"))
+    eligible = [tier for tier in POINTS_TIER_LIMITS if tier <= points]
+    return POINTS_TIER_LIMITS[max(eligible)] if eligible else POINTS_TIER_LIMITS[120]
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. `acquire` blocks until a token is available,
+    so callers queue instead of tripping the server-side limit.
+    """
+    def __init__(self, rate_per_min: float, burst: int = None):
+        self.rate = rate_per_min / 60.0
+        self.capacity = burst or max(1, int(rate_per_min // 10))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, tokens: float = 1):
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def drain(self):
+        """Empty the bucket (the server reported the limit): everyone queues for fresh tokens."""
+        with self._lock:
+            self._refill()
+            self.tokens = 0.0
+
+def get_api_limits() -> Dict[str, int]:
+    """
+    Per-API overrides of the per-minute budget, e.g. TUSHARE_API_LIMITS="daily=500,fina_indicator=100".
+    """
+    limits = {}
+    for item in os.getenv("TUSHARE_API_LIMITS", "").split(","):
+        if "=" in item:
+            api, rate = item.split("=", 1)
+            limits[api.strip()] = int(rate)
+    return limits
+
+# Tushare's "too many calls this minute" error (每分钟最多访问该接口N次). The daily
+# quota error (每天最多访问该接口N次) cannot clear by waiting and is raised at once.
+_MINUTE_LIMIT_MARKER = "每分钟"
+MAX_LIMIT_RETRIES = 3
+LIMIT_BACKOFF_SECONDS = 10
+MAX_TRACKED_SESSIONS = 1000
+
+# Session on whose behalf pro.* calls are currently made (propagates into fetch worker threads)
+_SESSION: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("tushare_session", default=None)
+
+@contextmanager
+def quota_session(session_id: Optional[str]):
+    """Attribute pro.* calls made in this context to `session_id`."""
+    token = _SESSION.set(session_id)
+    try:
+        yield
+    finally:
+        _SESSION.reset(token)
+
+def _new_usage() -> Dict[str, float]:
+    return {"calls": 0, "errors": 0, "limit_retries": 0, "wait_seconds": 0.0}
+
+class TushareLimiter:
+    """
+    Central limiter and quota accountant for every pro.* call in the process.
+
+    One token bucket per API (Tushare counts calls per interface per minute),
+    sized from the account tier or TUSHARE_API_LIMITS. Callers queue for a token
+    instead of failing; if the server still reports the limit, the bucket is
+    drained and the call retried after a backoff. Usage is counted globally, per
+    API and per session (see `quota_session`).
+
+    TUSHARE_RATE_SHARE (default 1) scales every budget, for processes that
+    share one account (sandbox workers).
+    """
+    def __init__(self, rate_per_min: Optional[int] = None, api_limits: Optional[Dict[str, int]] = None,
+                 share: Optional[float] = None, backoff: float = LIMIT_BACKOFF_SECONDS):
+        self.rate_per_min = rate_per_min or get_rate_per_min()
+        self.api_limits = get_api_limits() if api_limits is None else api_limits
+        self.share = share if share is not None else float(os.getenv("TUSHARE_RATE_SHARE", "1"))
+        self.backoff = backoff
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._usage: Dict[str, Dict[str, float]] = {}
+        self._sessions: "OrderedDict[str, Dict[str, Dict[str, float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def bucket(self, api_name: str) -> TokenBucket:
+        with self._lock:
+            bucket = self._buckets.get(api_name)
+            if bucket is None:
+                rate = self.api_limits.get(api_name, self.rate_per_min) * self.share
+                bucket = self._buckets[api_name] = TokenBucket(max(rate, 1))
+            return bucket
+
+    def _record(self, api_name: str, field: str, amount: float = 1):
+        session_id = _SESSION.get()
+        with self._lock:
+            self._usage.setdefault(api_name, _new_usage())[field] += amount
+            if session_id is None:
+                return
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._sessions[session_id] = {}
+                while len(self._sessions) > MAX_TRACKED_SESSIONS:
+                    self._sessions.popitem(last=False)
+            self._sessions.move_to_end(session_id)
+            session.setdefault(api_name, _new_usage())[field] += amount
+
+    def call(self, api_name: str, fn: Callable, *args, **kwargs):
+        bucket = self.bucket(api_name)
+        for attempt in range(MAX_LIMIT_RETRIES + 1):
+            start = time.monotonic()
+            bucket.acquire()
+            self._record(api_name, "wait_seconds", time.monotonic() - start)
+            self._record(api_name, "calls")
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                if attempt < MAX_LIMIT_RETRIES and _MINUTE_LIMIT_MARKER in str(e):
+                    self._record(api_name, "limit_retries")
+                    bucket.drain()
+                    time.sleep(self.backoff * (attempt + 1))
+                    continue
+                self._record(api_name, "errors")
+                raise
+
+    @staticmethod
+    def _summarize(usage: Dict[str, Dict[str, float]]) -> Dict[str, Any]:
+        total = _new_usage()
+        for counts in usage.values():
+            for field, value in counts.items():
+                total[field] += value
+        total["wait_seconds"] = round(total["wait_seconds"], 3)
+        by_api = {api: dict(c, wait_seconds=round(c["wait_seconds"], 3)) for api, c in usage.items()}
+        return dict(total, by_api=by_api)
+
+    def stats(self) -> Dict[str, Any]:
+        """Process-wide usage since start."""
+        with self._lock:
+            return self._summarize(self._usage)
+
+    def session_stats(self, session_id: str) -> Dict[str, Any]:
+        with self._lock:
+            return self._summarize(self._sessions.get(session_id, {}))
+
+class LimitedProApi:
+    """Wrapper for a Tushare `pro` client routing every API call through a TushareLimiter."""
+    def __init__(self, pro, limiter: TushareLimiter):
+        self._pro = pro
+        self._limiter = limiter
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._pro, name)
+        if not callable(attr):
+            return attr
+        if name == "query":
+            # pro.query(api_name, ...) is the generic entry point
+            return lambda api_name, *args, **kwargs: self._limiter.call(api_name, attr, api_name, *args, **kwargs)
+        return lambda *args, **kwargs: self._limiter.call(name, attr, *args, **kwargs)
+
+_LIMITER: Optional[TushareLimiter] = None
+_LIMITER_LOCK = threading.Lock()
+
+def get_tushare_limiter() -> TushareLimiter:
+    """Process-wide limiter shared by all sessions."""
+    global _LIMITER
+    with _LIMITER_LOCK:
+        if _LIMITER is None:
+            _LIMITER = TushareLimiter()
+        return _LIMITER
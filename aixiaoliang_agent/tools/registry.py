@@ -2,22 +2,26 @@ from typing import Callable, Any, Dict, Optional
 from dataclasses import dataclass
 import inspect
 
+# Tool result cacheability (seconds an identical call may be answered from memory)
+CACHE_FOREVER = float("inf")
+
 @dataclass
 class Tool:
     name: str
     description: str
     func: Callable
+    cache_ttl: Optional[float] = None  # None: never memoized (side effects / live data)
     
 class ToolRegistry:
     def __init__(self):
         self._tools: Dict[str, Tool] = {}
         
-    def register(self, name: str = None, description: str = None):
+    def register(self, name: str = None, description: str = None, cache_ttl: Optional[float] = None):
         """Decorator to register a function as a tool."""
         def decorator(func):
             tool_name = name or func.__name__
             tool_desc = description or func.__doc__ or "No description provided."
-            self._tools[tool_name] = Tool(tool_name, tool_desc, func)
+            self._tools[tool_name] = Tool(tool_name, tool_desc, func, cache_ttl)
             return func
         return decorator
         
@@ -0,0 +1,249 @@
+import io
+import os
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+import pandas as pd
+from .local_store import get_cache_dir
+
+# Seconds a Tushare response stays fresh, by API. APIs not listed are never cached.
+API_TTLS: Dict[str, float] = {
+    "daily": 300,
+    "daily_basic": 300,
+    "stock_basic": 3600,
+    "trade_cal": 6 * 3600,
+    "fina_indicator": 6 * 3600,
+    "income": 6 * 3600,
+    "concept": 24 * 3600,
+    "concept_detail": 24 * 3600,
+    "ths_index": 24 * 3600,
+    "ths_member": 24 * 3600,
+}
+
+DEFAULT_MAX_MB = 256
+DEFAULT_DISK_MAX_MB = 1024
+DISK_LOCK_TIMEOUT = 5
+
+def _frame_bytes(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+class _DiskTier:
+    """
+    SQLite-backed second level: Parquet blobs keyed like the memory tier,
+    evicted least-recently-accessed first beyond `max_bytes`.
+    """
+    def __init__(self, path: str, max_bytes: int, timeout: float = DISK_LOCK_TIMEOUT):
+        self.path = path
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        # Sandbox workers share the file; wait briefly for another process's write lock
+        self._conn = sqlite3.connect(path, timeout=timeout, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, api TEXT, expires REAL, accessed REAL, size INTEGER, data BLOB)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Tuple[float, pd.DataFrame]]:
+        with self._lock:
+            return self._get(key)
+
+    def put(self, key: str, api: str, expires: float, df: pd.DataFrame):
+        buf = io.BytesIO()
+        df.to_parquet(buf, index=False)
+        with self._lock:
+            self._put(key, api, expires, buf.getvalue())
+
+    def _get(self, key: str) -> Optional[Tuple[float, pd.DataFrame]]:
+        row = self._conn.execute("SELECT expires, data FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        expires, data = row
+        if expires <= time.time():
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._conn.commit()
+            return None
+        self._conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (time.time(), key))
+        self._conn.commit()
+        return expires, pd.read_parquet(io.BytesIO(data))
+
+    def _put(self, key: str, api: str, expires: float, data: bytes):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+            (key, api, expires, time.time(), len(data), data))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total > self.max_bytes:
+            # Drop expired rows, then the least recently accessed until under budget
+            self._conn.execute("DELETE FROM responses WHERE expires <= ?", (time.time(),))
+            rows = self._conn.execute("SELECT key, size FROM responses ORDER BY accessed").fetchall()
+            total = sum(size for _, size in rows)
+            for old_key, size in rows:
+                if total <= self.max_bytes:
+                    break
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (old_key,))
+                total -= size
+        self._conn.commit()
+
+class ResponseCache:
+    """
+    Process-wide cache of Tushare responses shared by all sessions.
+
+    In-memory LRU bounded by `max_bytes` (DataFrame memory usage), optionally
+    backed by a SQLite file so entries survive restarts. Entries expire after
+    the API's TTL; empty frames and errors are never stored. Concurrent misses
+    for the same key wait for a single upstream call.
+    """
+    def __init__(self, max_bytes: int, ttls: Optional[Dict[str, float]] = None, disk: Optional[_DiskTier] = None):
+        self.max_bytes = max_bytes
+        self.ttls = dict(API_TTLS if ttls is None else ttls)
+        self.disk = disk
+        self._entries: "OrderedDict[str, Tuple[float, pd.DataFrame, int]]" = OrderedDict()
+        self._bytes = 0
+        self._inflight: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    @staticmethod
+    def make_key(api_name: str, params: Dict[str, Any]) -> str:
+        return f"{api_name}:{sorted(params.items())!r}"
+
+    def _count(self, api_name: str, event: str):
+        counts = self._stats.setdefault(api_name, {"hits": 0, "misses": 0, "evictions": 0})
+        counts[event] += 1
+
+    def _lookup(self, key: str) -> Optional[pd.DataFrame]:
+        # Caller holds self._lock
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.time():
+            self._drop(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def _drop(self, key: str):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def _store(self, api_name: str, key: str, expires: float, df: pd.DataFrame):
+        # Caller holds self._lock
+        size = _frame_bytes(df)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = (expires, df, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            old_key = next(iter(self._entries))
+            self._drop(old_key)
+            self._count(old_key.split(":", 1)[0], "evictions")
+
+    def fetch(self, api_name: str, params: Dict[str, Any], call: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        """Return the cached response for (api_name, params), calling upstream on a miss."""
+        ttl = self.ttls.get(api_name)
+        if not ttl:
+            return call()
+        key = self.make_key(api_name, params)
+
+        while True:
+            with self._lock:
+                df = self._lookup(key)
+                if df is not None:
+                    self._count(api_name, "hits")
+                    return df.copy()
+                waiter = self._inflight.get(key)
+                if waiter is None:
+                    self._inflight[key] = threading.Event()
+                    break
+            waiter.wait()  # Another session is fetching this key; then re-check
+
+        try:
+            cached = None
+            if self.disk is not None:
+                try:
+                    cached = self.disk.get(key)
+                except Exception as e:
+                    print(f"[!] Warn: Failed to read cached Tushare response: {e}")
+            with self._lock:
+                if cached is not None:
+                    self._count(api_name, "hits")
+                    self._store(api_name, key, cached[0], cached[1])
+                    return cached[1].copy()
+                self._count(api_name, "misses")
+
+            df = call()
+            if isinstance(df, pd.DataFrame) and not df.empty:
+                expires = time.time() + ttl
+                with self._lock:
+                    self._store(api_name, key, expires, df.copy())
+                if self.disk is not None:
+                    try:
+                        self.disk.put(key, api_name, expires, df)
+                    except Exception as e:
+                        print(f"[!] Warn: Failed to persist Tushare response: {e}")
+            return df
+        finally:
+            with self._lock:
+                self._inflight.pop(key).set()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = sum(c["hits"] for c in self._stats.values())
+            misses = sum(c["misses"] for c in self._stats.values())
+            return {
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": round(hits / (hits + misses), 3) if hits + misses else None,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "by_api": {api: dict(c) for api, c in self._stats.items()},
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+class CachedProApi:
+    """
+    Drop-in wrapper for a Tushare `pro` client: `pro.daily(...)` etc. go through
+    the shared ResponseCache; other attributes pass through untouched.
+    """
+    def __init__(self, pro, cache: ResponseCache):
+        self._pro = pro
+        self._cache = cache
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._pro, name)
+        if name not in self._cache.ttls or not callable(attr):
+            return attr
+        def cached_call(*args, **kwargs):
+            if args:  # Positional `fields`: rare, not worth normalizing
+                return attr(*args, **kwargs)
+            return self._cache.fetch(name, kwargs, lambda: attr(**kwargs))
+        return cached_call
+
+_CACHE: Optional[ResponseCache] = None
+_CACHE_LOCK = threading.Lock()
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """
+    The process-wide response cache, configured by TUSHARE_CACHE:
+    'memory' (default), 'sqlite' (memory + <DATA_CACHE_DIR>/tushare_responses.sqlite) or 'off'.
+    """
+    global _CACHE
+    mode = os.getenv("TUSHARE_CACHE", "memory").lower()
+    if mode == "off":
+        return None
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            disk = None
+            if mode == "sqlite":
+                disk_mb = int(os.getenv("TUSHARE_CACHE_DISK_MB", DEFAULT_DISK_MAX_MB))
+                disk = _DiskTier(os.path.join(get_cache_dir(), "tushare_responses.sqlite"), disk_mb * 1024 * 1024)
+            _CACHE = ResponseCache(int(os.getenv("TUSHARE_CACHE_MB", DEFAULT_MAX_MB)) * 1024 * 1024, disk=disk)
+        return _CACHE
@@ -0,0 +1,147 @@
+import threading
+from typing import Dict, List, Set
+import pandas as pd
+
+try:
+    from pypinyin import lazy_pinyin
+except ImportError:  # Pinyin search is optional
+    lazy_pinyin = None
+
+# Ranking tiers (lower is better)
+RANK_EXACT = 0          # '000001.SZ', '000001', '平安银行'
+RANK_NAME_PREFIX = 1    # '平安' -> 平安银行
+RANK_PINYIN = 2         # 'payh' / 'pinganyinhang' -> 平安银行
+RANK_PINYIN_PREFIX = 3  # 'pay' -> 平安银行
+RANK_CODE_PREFIX = 4    # '6005' -> 600519.SH
+RANK_SUBSTRING = 5      # '银行' -> 平安银行
+RANK_CODE_SUBSTRING = 6 # '0519' -> 600519.SH
+
+class _Trie:
+    """Prefix tree; every node keeps the ids of all entries below it."""
+    def __init__(self):
+        self.root: Dict = {}
+
+    def add(self, key: str, idx: int):
+        node = self.root
+        for ch in key:
+            node = node.setdefault(ch, {})
+            node.setdefault("_ids", set()).add(idx)
+
+    def prefix(self, key: str) -> Set[int]:
+        node = self.root
+        for ch in key:
+            node = node.get(ch)
+            if node is None:
+                return set()
+        return node.get("_ids", set())
+
+class StockSearchIndex:
+    """
+    Prebuilt lookup structures over the stock universe for `search_stock`:
+    - exact hash map for ts_code / symbol / name
+    - prefix tries over names, codes and pinyin (full + initials)
+    - character n-gram indexes (1- and 2-grams) over names and codes for substring matches
+    """
+    def __init__(self, df: pd.DataFrame):
+        self.ts_codes: List[str] = df['ts_code'].tolist()
+        self.names: List[str] = df['name'].fillna('').tolist()
+        self.industries: List = df['industry'].tolist()
+
+        self._exact: Dict[str, int] = {}
+        self._pinyin: Dict[str, Set[int]] = {}
+        self._name_trie = _Trie()
+        self._code_trie = _Trie()
+        self._pinyin_trie = _Trie()
+        self._ngrams: Dict[str, Set[int]] = {}
+        self._code_ngrams: Dict[str, Set[int]] = {}
+        self._code_keys: List[str] = [c.lower() for c in self.ts_codes]
+
+        symbols = df['symbol'].tolist() if 'symbol' in df.columns else [c.split('.')[0] for c in self.ts_codes]
+        for idx, (code, symbol, name) in enumerate(zip(self.ts_codes, symbols, self.names)):
+            code_key = code.lower()
+            self._exact.setdefault(code_key, idx)
+            self._exact.setdefault(str(symbol).lower(), idx)
+            self._exact.setdefault(name.lower(), idx)
+            self._code_trie.add(code_key, idx)
+            self._add_ngrams(self._code_ngrams, code_key, idx)
+
+            name_key = name.lower()
+            self._name_trie.add(name_key, idx)
+            self._add_ngrams(self._ngrams, name_key, idx)
+
+            for key in self._pinyin_keys(name):
+                self._pinyin.setdefault(key, set()).add(idx)
+                self._pinyin_trie.add(key, idx)
+
+    @staticmethod
+    def _pinyin_keys(name: str) -> List[str]:
+        if lazy_pinyin is None or not name:
+            return []
+        syllables = [s.lower() for s in lazy_pinyin(name) if s.strip()]
+        full = "".join(syllables)
+        initials = "".join(s[0] for s in syllables if s[0].isalnum())
+        return [k for k in {full, initials} if k]
+
+    @staticmethod
+    def _add_ngrams(ngrams: Dict[str, Set[int]], text: str, idx: int):
+        for n in (1, 2):
+            for i in range(len(text) - n + 1):
+                ngrams.setdefault(text[i:i + n], set()).add(idx)
+
+    @staticmethod
+    def _substring(key: str, ngrams: Dict[str, Set[int]], texts: List[str]) -> Set[int]:
+        """Ids whose (lower-cased) text contains `key`, narrowed down by the n-gram index first."""
+        n = 2 if len(key) >= 2 else 1
+        candidates = None
+        for i in range(len(key) - n + 1):
+            ids = ngrams.get(key[i:i + n], set())
+            candidates = ids if candidates is None else candidates & ids
+            if not candidates:
+                return set()
+        return {i for i in candidates if key in texts[i].lower()}
+
+    def search(self, keyword: str, limit: int = 5) -> List[int]:
+        """
+        Return row positions of the best matches, ranked by match tier,
+        then by name length (closer match first), then by universe order.
+        """
+        key = keyword.strip().lower()
+        if not key:
+            return []
+
+        ranks: Dict[int, int] = {}
+        def hit(ids, rank):
+            for i in ids:
+                if i not in ranks or rank < ranks[i]:
+                    ranks[i] = rank
+
+        if key in self._exact:
+            hit([self._exact[key]], RANK_EXACT)
+        hit(self._name_trie.prefix(key), RANK_NAME_PREFIX)
+        if key.isascii():
+            hit(self._pinyin.get(key, ()), RANK_PINYIN)
+            hit(self._pinyin_trie.prefix(key), RANK_PINYIN_PREFIX)
+            hit(self._code_trie.prefix(key), RANK_CODE_PREFIX)
+        hit(self._substring(key, self._ngrams, self.names), RANK_SUBSTRING)
+        if key.isascii():
+            hit(self._substring(key, self._code_ngrams, self._code_keys), RANK_CODE_SUBSTRING)
+
+        ranked = sorted(ranks, key=lambda i: (ranks[i], len(self.names[i]), i))
+        return ranked[:limit]
+
+    def records(self, ids: List[int]) -> List[Dict]:
+        return [{"ts_code": self.ts_codes[i], "name": self.names[i], "industry": self.industries[i]} for i in ids]
+
+_CACHE = {"df": None, "index": None}
+_LOCK = threading.Lock()
+
+def get_search_index(df: pd.DataFrame) -> StockSearchIndex:
+    """
+    Return the index for this universe DataFrame, rebuilding only when the
+    universe object changes (i.e. after the daily universe refresh).
+    """
+    with _LOCK:
+        if _CACHE["df"] is not df:
+            _CACHE["index"] = StockSearchIndex(df)
+            _CACHE["df"] = df
+        return _CACHE["index"]
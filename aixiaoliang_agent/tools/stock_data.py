@@ -1,22 +1,32 @@
 import os
-import tushare as ts
+import datetime
+from typing import Callable, List, Union
 import pandas as pd
-import time
 from dotenv import load_dotenv
-from .registry import register_tool
+from .registry import register_tool, CACHE_FOREVER
 from .data_utils import normalize_stock_records, create_envelope
+from .universe import get_stock_universe
+from .search_index import get_search_index
+from .financial_store import load_financial_indicator
+from .market_store import load_cross_section, lookup_latest
+from .derived_metrics import default_derived_metrics
+from .fetch_engine import fetch_complete
+from .response_cache import CachedProApi, get_response_cache
+from .rate_limiter import LimitedProApi, get_tushare_limiter
+from .tushare_client import TushareClient
 
 load_dotenv()
 
 _PRO = None
 _IS_INIT = False
 
+# Multi-code requests: codes per request, and Tushare's cap on rows per response
+BATCH_CHUNK_SIZE = 50
+MAX_ROWS_PER_REQUEST = 5000
+# Calendar days that always contain the latest trading day (covers the Spring Festival break)
+LATEST_WINDOW_DAYS = 15
+
 def ensure_tushare_init():
-    # Always enforce Tushare Proxy (Ping-Pong Strategy with Gemini)
-    ts_proxy = os.getenv("TUSHARE_PROXY", "http://tushare.xyz:5000")
-    if ts_proxy and ts_proxy.lower() != "none":
-         os.environ["HTTP_PROXY"] = ts_proxy
-         
     global _PRO, _IS_INIT
     if _IS_INIT:
         return _PRO
@@ -27,8 +37,12 @@ def ensure_tushare_init():
         return None
 
     try:
-        # Init Pro API
-        _PRO = ts.pro_api(token)
+        # Init Pro API: every call is rate-limited and accounted; cache hits spend no quota
+        # The client carries its own proxy (TUSHARE_PROXY); the process environment is untouched
+        _PRO = LimitedProApi(TushareClient(token), get_tushare_limiter())
+        cache = get_response_cache()
+        if cache is not None:
+            _PRO = CachedProApi(_PRO, cache)
         _IS_INIT = True
         print("[*] Tushare Pro initialized successfully.")
         return _PRO
@@ -36,36 +50,37 @@ def ensure_tushare_init():
         print(f"[!] Tushare initialization failed: {e}")
         return None
 
-@register_tool(description="Search for a stock code by name. Example: '平安' -> '000001.SZ'. Returns Envelope.")
+def _snapshot_row(pro, api_name: str, stock_code: str):
+    """Row from the latest cached market snapshot, or None to fall back to a per-stock request."""
+    try:
+        return lookup_latest(pro, api_name, stock_code)
+    except Exception as e:
+        print(f"[!] Warn: Snapshot lookup failed, asking Tushare: {e}")
+        return None
+
+@register_tool(description="Search for a stock code by name, code or pinyin initials. Example: '平安' / 'payh' -> '000001.SZ'. Returns Envelope.", cache_ttl=3600)
 def search_stock(keyword: str):
     """
-    Search for stock code (ts_code) by display name.
+    Search for stock code (ts_code) by display name, code, or pinyin.
+    Results are ranked: exact > name prefix > pinyin > code prefix > substring.
     """
     pro = ensure_tushare_init()
     if not pro:
         return create_envelope(None, status="error", error="Tushare not initialized")
     
     try:
-        df = pro.stock_basic(exchange='', list_status='L', fields='ts_code,symbol,name,industry')
-        matches = df[df['name'].str.contains(keyword, case=False, na=False) | 
-                     df['ts_code'].str.contains(keyword, case=False, na=False)]
+        index = get_search_index(get_stock_universe(pro))
+        matches = index.search(keyword, limit=5)
         
-        if matches.empty:
+        if not matches:
             return create_envelope([], status="empty", meta={"hint": f"No stock found matching '{keyword}'. Try a different keyword."})
             
-        records = []
-        for _, row in matches.head(5).iterrows():
-            records.append({
-                "ts_code": row['ts_code'],
-                "name": row['name'],
-                "industry": row['industry']
-            })
-        data = normalize_stock_records(records)
+        data = normalize_stock_records(index.records(matches))
         return create_envelope(data, status="success")
     except Exception as e:
         return create_envelope(None, status="error", error=f"Search failed: {e}")
 
-@register_tool(description="Get the current price (or latest close) of a stock. Returns Envelope.")
+@register_tool(description="Get the current price (or latest close) of a stock. Returns Envelope.", cache_ttl=60)
 def get_current_price(stock_code: str):
     """
     Returns the latest daily close price.
@@ -75,7 +90,9 @@ def get_current_price(stock_code: str):
         return create_envelope(None, status="error", error="Tushare not initialized")
     
     try:
-        df = pro.daily(ts_code=stock_code, limit=1)
+        # Answered locally when the latest trading day's market snapshot is loaded
+        row = _snapshot_row(pro, 'daily', stock_code)
+        df = row.to_frame().T if row is not None else pro.daily(ts_code=stock_code, limit=1)
         if df.empty:
              return create_envelope(None, status="empty", meta={"hint": f"No price data for {stock_code}. Check if code is correct."})
         
@@ -86,7 +103,7 @@ def get_current_price(stock_code: str):
     except Exception as e:
         return create_envelope(None, status="error", error=f"Fetch price failed: {e}")
 
-@register_tool(description="Get fundamental data (PE, PB, Market Cap, Revenue, etc.). Returns Envelope.")
+@register_tool(description="Get fundamental data (PE, PB, Market Cap, Revenue, etc.). Returns Envelope.", cache_ttl=300)
 def get_fundamentals_data(stock_code: str):
     """
     Returns key financial indicators (daily basic) and income data.
@@ -96,7 +113,11 @@ def get_fundamentals_data(stock_code: str):
         return create_envelope(None, status="error", error="Tushare not initialized")
 
     try:
-        df_daily = pro.daily_basic(ts_code=stock_code, limit=1, fields='ts_code,trade_date,pe,pe_ttm,pb,total_mv,dv_ratio,dv_ttm')
+        row = _snapshot_row(pro, 'daily_basic', stock_code)
+        if row is not None:
+            df_daily = row.to_frame().T
+        else:
+            df_daily = pro.daily_basic(ts_code=stock_code, limit=1, fields='ts_code,trade_date,pe,pe_ttm,pb,total_mv,dv_ratio,dv_ttm')
         df_income = pro.income(ts_code=stock_code, limit=1, fields='total_revenue,n_income_attr_p')
         
         result = {}
@@ -121,7 +142,7 @@ def get_fundamentals_data(stock_code: str):
     except Exception as e:
         return create_envelope(None, status="error", error=f"Fetch fundamentals failed: {e}")
 
-@register_tool(description="Get list of stocks in a specific industry. Returns Envelope.")
+@register_tool(description="Get list of stocks in a specific industry. Returns Envelope.", cache_ttl=3600)
 def get_industry_stocks(industry_name: str):
     """
     Search for stocks belonging to a specific industry.
@@ -131,24 +152,17 @@ def get_industry_stocks(industry_name: str):
         return create_envelope(None, status="error", error="Tushare not initialized")
     
     try:
-        df = pro.stock_basic(exchange='', list_status='L', fields='ts_code,symbol,name,industry')
+        df = get_stock_universe(pro)
         matches = df[df['industry'].str.contains(industry_name, case=False, na=False)]
         
         if matches.empty:
             return create_envelope([], status="empty", meta={"hint": f"No stocks found for industry '{industry_name}'. Check industry name."})
             
-        records = []
-        for _, row in matches.head(20).iterrows():
-            records.append({
-                "ts_code": row['ts_code'],
-                "name": row['name'],
-                "industry": row['industry']
-            })
-        return create_envelope(normalize_stock_records(records), status="success")
+        return create_envelope(matches.head(20)[['ts_code', 'name', 'industry']], status="success")
     except Exception as e:
         return create_envelope(None, status="error", error=f"Fetch industry failed: {e}")
 
-@register_tool(description="Get historical daily price data. Returns Envelope.")
+@register_tool(description="Get historical daily price data. Returns Envelope.", cache_ttl=600)
 def get_history_data(stock_code: str, start_date: str, end_date: str):
     """
     Get daily Open/High/Low/Close/Vol data. 
@@ -168,8 +182,7 @@ def get_history_data(stock_code: str, start_date: str, end_date: str):
             return create_envelope([], status="empty", meta={"hint": f"No data between {start_date} and {end_date}."})
             
         df = df.sort_values('trade_date')
-        records = df[['ts_code', 'trade_date', 'close', 'open', 'high', 'low', 'vol', 'pct_chg']].to_dict(orient='records')
-        return create_envelope(normalize_stock_records(records), status="success")
+        return create_envelope(df[['ts_code', 'trade_date', 'close', 'open', 'high', 'low', 'vol', 'pct_chg']], status="success")
     except Exception as e:
         return create_envelope(None, status="error", error=f"Fetch history failed: {e}")
 
@@ -208,7 +221,7 @@ def plot_price_history(stock_code: str, start_date: str, end_date: str):
     except Exception as e:
         return create_envelope(None, status="error", error=f"Plotting failed: {e}")
 
-@register_tool(description="获取市场概念列表。src='ts'为Tushare概念，'ths'为同花顺概念。Returns Envelope.")
+@register_tool(description="获取市场概念列表。src='ts'为Tushare概念，'ths'为同花顺概念。Returns Envelope.", cache_ttl=3600)
 def get_concepts(src: str = 'ts'):
     """
     Get list of concepts/industries.
@@ -228,7 +241,7 @@ def get_concepts(src: str = 'ts'):
     except Exception as e:
         return create_envelope(None, status="error", error=f"Fetch concepts failed: {e}")
 
-@register_tool(description="获取特定概念下的股票列表。id为概念代码。Returns Envelope.")
+@register_tool(description="获取特定概念下的股票列表。id为概念代码。Returns Envelope.", cache_ttl=3600)
 def get_concept_stocks(id: str):
     """
     Get stocks belonging to a specific concept.
@@ -246,68 +259,67 @@ def get_concept_stocks(id: str):
         if 'ts_code' not in df.columns and 'code' in df.columns:
              df['ts_code'] = df['code']
              
-        records = df[['ts_code', 'name']].head(100).to_dict(orient='records')
-        return create_envelope(normalize_stock_records(records), status="success")
+        return create_envelope(df[['ts_code', 'name']].head(100), status="success")
     except Exception as e:
         return create_envelope(None, status="error", error=f"Fetch concept stocks failed: {e}")
 
-@register_tool(description="《Market Screener Tool》Get daily market snapshot for ALL stocks. date: YYYYMMDD. Returns Envelope.")
-def get_market_daily(trade_date: str):
+@register_tool(description="《Market Screener Tool》Get daily market snapshot for ALL stocks. date: YYYYMMDD. data_format='frame' puts a DataFrame in data (fastest). Returns Envelope.", cache_ttl=600)
+def get_market_daily(trade_date: str, data_format: str = 'records'):
     """
     Get daily quotes for ALL stocks on a specific date. 
+    Settled trade dates are served from the local date-partitioned store.
     """
     try:
         pro = ensure_tushare_init()
-        df = pro.daily(trade_date=trade_date)
+        df = load_cross_section('daily', trade_date, lambda: pro.daily(trade_date=trade_date))
         
         if df.empty:
             return create_envelope([], status="empty", meta={"hint": "No market data found for this date. It might be a holiday or data is not yet available."})
         
         fields = ['ts_code', 'trade_date', 'close', 'open', 'high', 'low', 'pct_chg', 'vol', 'amount']
-        df = df[fields]
-        records = df.to_dict(orient='records')
-        return create_envelope(normalize_stock_records(records), status="success")
+        return create_envelope(df[fields], status="success", data_format=data_format)
     except Exception as e:
         return create_envelope(None, status="error", error=f"Fetch market daily failed: {e}")
 
-@register_tool(description="《Market Screener Tool》Get daily basic indicators (PE, PB, Turnover, Dividend, Market Cap) for ALL stocks. date: YYYYMMDD. Returns Envelope.")
-def get_daily_basic(trade_date: str):
+@register_tool(description="《Market Screener Tool》Get daily basic indicators (PE, PB, Turnover, Dividend, Market Cap) for ALL stocks. date: YYYYMMDD. data_format='frame' puts a DataFrame in data (fastest). Returns Envelope.", cache_ttl=600)
+def get_daily_basic(trade_date: str, data_format: str = 'records'):
     """
     Get fundamental indicators for ALL stocks on a specific date.
     Essential for screening stocks by PE, PB, Dividend Yield, Market Cap, Revenue (TTM), and Net Profit (TTM).
     Note: 'total_revenue_ttm' and 'net_profit_ttm' are derived from MV/PS and MV/PE ratios.
+    Settled trade dates are served from the local date-partitioned store.
     """
     try:
         pro = ensure_tushare_init()
         # Fetch daily basic data
         # Fields: ts_code, trade_date, close, turnover_rate, volume_ratio, pe, pe_ttm, pb, ps, ps_ttm, dv_ratio, dv_ttm, total_share, float_share, free_share, total_mv, circ_mv
         fields = 'ts_code,trade_date,close,turnover_rate,volume_ratio,pe,pe_ttm,pb,ps,ps_ttm,dv_ratio,dv_ttm,total_share,float_share,free_share,total_mv,circ_mv'
-        df = pro.daily_basic(trade_date=trade_date, fields=fields)
+        df = load_cross_section('daily_basic', trade_date, lambda: pro.daily_basic(trade_date=trade_date, fields=fields))
         
         if df.empty:
             return create_envelope([], status="empty", meta={"hint": "No basic data found for this date. Check if it is a trading day or holiday."})
         
-        # Calculate derived fields (Revenue TTM, Net Profit TTM)
-        # total_mv is in 10k (万元), convert to Yuan.
-        df['total_revenue_ttm'] = df.apply(lambda row: (row['total_mv'] * 10000) / row['ps_ttm'] if row['ps_ttm'] else None, axis=1)
-        df['net_profit_ttm'] = df.apply(lambda row: (row['total_mv'] * 10000) / row['pe_ttm'] if row['pe_ttm'] else None, axis=1)
+        # Calculate derived fields (Revenue TTM, Net Profit TTM) in bulk.
+        # See derived_metrics.py for definitions and unit conversions (万元 -> 元).
+        df = default_derived_metrics.apply(df)
         
-        records = df.to_dict(orient='records')
-        return create_envelope(normalize_stock_records(records), status="success")
+        return create_envelope(df, status="success", data_format=data_format)
     except Exception as e:
         return create_envelope(None, status="error", error=f"Fetch daily basic failed: {e}")
 
-@register_tool(description="《Market Screener Tool》Get financial ratios (ROE, Margins) for ALL stocks. period: YYYYMMDD (Quarter End). Returns Envelope.")
-def get_financial_indicator(period: str):
+@register_tool(description="《Market Screener Tool》Get financial ratios (ROE, Margins) for ALL stocks. period: YYYYMMDD (Quarter End). data_format='frame' puts a DataFrame in data (fastest). Returns Envelope.", cache_ttl=CACHE_FOREVER)
+def get_financial_indicator(period: str, data_format: str = 'records'):
     """
     Get financial ratios (ROE, Gross Margin, Net Margin, etc.) for ALL stocks for a specific reporting period.
     Use Quarter End dates: e.g. '20241231', '20250331', '20250630'.
-    Note: Iterates through all stocks in chunks, which may take ~10-20 seconds.
+    Note: Quarter data is cached locally per period; only stocks not yet cached are
+    fetched (in concurrent chunks, paced by the Tushare points tier).
+    meta['coverage'] reports requested/returned/missing stock counts.
     """
     try:
         pro = ensure_tushare_init()
         # 1. Get all stock codes
-        basics = pro.stock_basic(exchange='', list_status='L', fields='ts_code')
+        basics = get_stock_universe(pro)
         if basics.empty:
             return create_envelope(None, status="error", error="Failed to fetch stock list.")
         
@@ -316,38 +328,19 @@ def get_financial_indicator(period: str):
         # 2. Define fields
         fields = 'ts_code,end_date,roe,roe_dt,gross_margin,netprofit_margin,dt_eps'
         
-        # 3. Chunk and fetch
-        results = []
-        chunk_size = 50 
-        # Note: Depending on permission, 50-100 is safe.
-        
-        # Helper logging
-        print(f"[*] Batch fetching financials for period {period} ({len(all_codes)} stocks)...")
-        
-        for i in range(0, len(all_codes), chunk_size):
-            chunk = all_codes[i:i+chunk_size]
-            codes_str = ",".join(chunk)
-
-            try:
-                # Tushare call
-                df_chunk = pro.fina_indicator(ts_code=codes_str, period=period, fields=fields)
-                if not df_chunk.empty:
-                    results.extend(df_chunk.to_dict(orient='records'))
-            except Exception as e:
-                # Log but continue
-                print(f"[!] Warn: Chunk {i} failed: {e}")
-                
-            time.sleep(0.5) # Rate limiting
+        # 3. Read the local period store; back-fill gaps in concurrent chunks
+        # (paced by the points-tier token bucket, dropped codes re-queued).
+        df, coverage = load_financial_indicator(pro, period, all_codes, fields)
                 
-        if not results:
-            return create_envelope([], status="empty", meta={"hint": f"No financial data found for {period}. Ensure date is valid quarter end."})
+        if df.empty:
+            return create_envelope([], status="empty", meta={"hint": f"No financial data found for {period}. Ensure date is valid quarter end.", "coverage": coverage})
             
-        return create_envelope(normalize_stock_records(results), status="success")
+        return create_envelope(df, status="success", meta={"coverage": coverage}, data_format=data_format)
     except Exception as e:
         return create_envelope(None, status="error", error=f"Fetch financial indicator failed: {e}")
 
 
-@register_tool(description="Get financial indicators for a SPECIFIC stock over multiple periods (DuPont analysis). Returns Envelope.")
+@register_tool(description="Get financial indicators for a SPECIFIC stock over multiple periods (DuPont analysis). Returns Envelope.", cache_ttl=CACHE_FOREVER)
 def get_stock_financials(stock_code: str, limit: int = 8):
     """
     Get ROE, Net Margin, Asset Turnover, and Equity Multiplier for a specific stock.
@@ -361,12 +354,11 @@ def get_stock_financials(stock_code: str, limit: int = 8):
         if df.empty:
             return create_envelope([], status="empty", meta={"hint": f"No financial indicators found for {stock_code}."})
             
-        records = df.to_dict(orient='records')
-        return create_envelope(normalize_stock_records(records), status="success")
+        return create_envelope(df, status="success")
     except Exception as e:
         return create_envelope(None, status="error", error=f"Fetch stock financials failed: {e}")
 
-@register_tool(description="Get historical valuation indicators (PE, PB, PS) for a specific stock. Returns Envelope.")
+@register_tool(description="Get historical valuation indicators (PE, PB, PS) for a specific stock. Returns Envelope.", cache_ttl=600)
 def get_valuation_history(stock_code: str, start_date: str, end_date: str):
     """
     Get historical PE, PB, PS, and Dividend Yield for a stock over a date range.
@@ -385,7 +377,141 @@ def get_valuation_history(stock_code: str, start_date: str, end_date: str):
             return create_envelope([], status="empty", meta={"hint": f"No valuation history for {stock_code} in this range."})
             
         df = df.sort_values('trade_date')
-        records = df.to_dict(orient='records')
-        return create_envelope(normalize_stock_records(records), status="success")
+        return create_envelope(df, status="success")
+    except Exception as e:
+        return create_envelope(None, status="error", error=f"Fetch valuation history failed: {e}")
+
+
+def _parse_codes(stock_codes: Union[List[str], str]) -> List[str]:
+    """List (or comma-separated string) of codes, de-duplicated, order kept."""
+    if isinstance(stock_codes, str):
+        stock_codes = stock_codes.split(',')
+    return list(dict.fromkeys(c.strip() for c in stock_codes if c and c.strip()))
+
+def _fetch_codes(fetch_fn: Callable[[str], pd.DataFrame], codes: List[str], rows_per_code: int):
+    """
+    Coalesce per-stock requests into multi-code ones: `fetch_fn` gets a
+    comma-joined `ts_code`, chunks are sized to stay under the row cap.
+    """
+    chunk_size = max(1, min(BATCH_CHUNK_SIZE, MAX_ROWS_PER_REQUEST // max(1, rows_per_code)))
+    return fetch_complete(lambda chunk: fetch_fn(",".join(chunk)), codes, chunk_size=chunk_size)
+
+def _in_code_order(df: pd.DataFrame, codes: List[str], date_col: str, ascending: bool = True) -> pd.DataFrame:
+    order = df['ts_code'].map({c: i for i, c in enumerate(codes)})
+    return (df.assign(_order=order)
+              .sort_values(['_order', date_col], ascending=[True, ascending])
+              .drop(columns='_order')
+              .reset_index(drop=True))
+
+def _latest_rows(df: pd.DataFrame, date_col: str, n: int = 1) -> pd.DataFrame:
+    """The `n` most recent rows per stock."""
+    df = df.drop_duplicates(['ts_code', date_col])
+    return df.sort_values(date_col).groupby('ts_code', sort=False).tail(n)
+
+def _batch_envelope(df: pd.DataFrame, coverage: dict, data_format: str, hint: str):
+    if df.empty:
+        return create_envelope([], status="empty", meta={"hint": hint, "coverage": coverage})
+    return create_envelope(df, status="success", meta={"coverage": coverage}, data_format=data_format)
+
+def _recent_window(days: int):
+    today = datetime.date.today()
+    return (today - datetime.timedelta(days=days)).strftime('%Y%m%d'), today.strftime('%Y%m%d')
+
+@register_tool(description="Batch get_current_price for a LIST of stock codes (one request per ~50 stocks). Columns: ts_code, trade_date, close, pct_chg. Returns columnar Envelope (data: column -> array; data_format='frame' for a DataFrame).", cache_ttl=60)
+def get_current_price_batch(stock_codes: List[str], data_format: str = 'columns'):
+    """
+    Latest daily close for many stocks, from multi-code `daily` requests over
+    the last couple of weeks. meta['coverage'] lists codes without data.
+    """
+    pro = ensure_tushare_init()
+    if not pro:
+        return create_envelope(None, status="error", error="Tushare not initialized")
+
+    try:
+        codes = _parse_codes(stock_codes)
+        start, end = _recent_window(LATEST_WINDOW_DAYS)
+        df, coverage = _fetch_codes(
+            lambda ts_code: pro.daily(ts_code=ts_code, start_date=start, end_date=end, fields='ts_code,trade_date,close,pct_chg'),
+            codes, rows_per_code=LATEST_WINDOW_DAYS)
+        if not df.empty:
+            df = _in_code_order(_latest_rows(df, 'trade_date'), codes, 'trade_date')
+        return _batch_envelope(df, coverage, data_format, "No price data for these codes. Check if codes are correct.")
+    except Exception as e:
+        return create_envelope(None, status="error", error=f"Fetch prices failed: {e}")
+
+@register_tool(description="Batch get_fundamentals_data for a LIST of stock codes (one request per ~50 stocks). Columns: ts_code, trade_date, pe, pe_ttm, pb, ps_ttm, dv_ratio, dv_ttm, total_mv, total_revenue_ttm, net_profit_ttm (TTM values derived from MV/PS and MV/PE, in 元). Returns columnar Envelope.", cache_ttl=300)
+def get_fundamentals_data_batch(stock_codes: List[str], data_format: str = 'columns'):
+    """
+    Latest valuation indicators for many stocks from multi-code `daily_basic`
+    requests. Revenue / net profit are the TTM figures derived in bulk
+    (see derived_metrics.py) instead of one income request per stock.
+    """
+    pro = ensure_tushare_init()
+    if not pro:
+        return create_envelope(None, status="error", error="Tushare not initialized")
+
+    try:
+        codes = _parse_codes(stock_codes)
+        start, end = _recent_window(LATEST_WINDOW_DAYS)
+        fields = 'ts_code,trade_date,pe,pe_ttm,pb,ps_ttm,dv_ratio,dv_ttm,total_mv'
+        df, coverage = _fetch_codes(
+            lambda ts_code: pro.daily_basic(ts_code=ts_code, start_date=start, end_date=end, fields=fields),
+            codes, rows_per_code=LATEST_WINDOW_DAYS)
+        if not df.empty:
+            df = _in_code_order(_latest_rows(df, 'trade_date'), codes, 'trade_date')
+            df = default_derived_metrics.apply(df)
+        return _batch_envelope(df, coverage, data_format, "No fundamentals data found. Stocks might be delisted or new.")
+    except Exception as e:
+        return create_envelope(None, status="error", error=f"Fetch fundamentals failed: {e}")
+
+@register_tool(description="Batch get_stock_financials for a LIST of stock codes: the latest `limit` quarters per stock (newest first), one request per few stocks. Returns columnar Envelope.", cache_ttl=CACHE_FOREVER)
+def get_stock_financials_batch(stock_codes: List[str], limit: int = 8, data_format: str = 'columns'):
+    """
+    ROE, margins, asset turnover and leverage over the last `limit` quarters for
+    many stocks, from multi-code `fina_indicator` requests over the announcement
+    window that covers those quarters.
+    """
+    pro = ensure_tushare_init()
+    if not pro:
+        return create_envelope(None, status="error", error="Tushare not initialized")
+
+    try:
+        codes = _parse_codes(stock_codes)
+        # `limit` quarters back, plus up to 4 months between quarter end and announcement
+        start, end = _recent_window(limit * 92 + 122)
+        fields = 'ts_code,end_date,roe,netprofit_margin,gross_margin,assets_turnover,equity_multiplier,debt_to_assets'
+        df, coverage = _fetch_codes(
+            lambda ts_code: pro.fina_indicator(ts_code=ts_code, start_date=start, end_date=end, fields=fields),
+            codes, rows_per_code=limit + 2)
+        if not df.empty:
+            df = _in_code_order(_latest_rows(df, 'end_date', limit), codes, 'end_date', ascending=False)
+        return _batch_envelope(df, coverage, data_format, "No financial indicators found for these codes.")
+    except Exception as e:
+        return create_envelope(None, status="error", error=f"Fetch stock financials failed: {e}")
+
+@register_tool(description="Batch get_valuation_history for a LIST of stock codes over one date range (multi-code requests sized to the range). Returns columnar Envelope sorted by ts_code, trade_date.", cache_ttl=600)
+def get_valuation_history_batch(stock_codes: List[str], start_date: str, end_date: str, data_format: str = 'columns'):
+    """
+    Historical PE, PB, PS and dividend yield for many stocks. Codes per request
+    shrink as the range grows, so every response stays under Tushare's row cap.
+    """
+    pro = ensure_tushare_init()
+    if not pro:
+        return create_envelope(None, status="error", error="Tushare not initialized")
+
+    try:
+        codes = _parse_codes(stock_codes)
+        start_date = start_date.replace('-', '')
+        end_date = end_date.replace('-', '')
+        days = (datetime.datetime.strptime(end_date, '%Y%m%d') - datetime.datetime.strptime(start_date, '%Y%m%d')).days
+        trading_days = days * 5 // 7 + 1
+
+        fields = 'ts_code,trade_date,pe,pe_ttm,pb,ps,ps_ttm,dv_ratio,dv_ttm'
+        df, coverage = _fetch_codes(
+            lambda ts_code: pro.daily_basic(ts_code=ts_code, start_date=start_date, end_date=end_date, fields=fields),
+            codes, rows_per_code=trading_days)
+        if not df.empty:
+            df = _in_code_order(df.drop_duplicates(['ts_code', 'trade_date']), codes, 'trade_date')
+        return _batch_envelope(df, coverage, data_format, "No valuation history for these codes in this range.")
     except Exception as e:
         return create_envelope(None, status="error", error=f"Fetch valuation history failed: {e}")
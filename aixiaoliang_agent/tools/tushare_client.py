@@ -0,0 +1,86 @@
+import os
+import json
+import threading
+from functools import partial
+from typing import Dict, Optional, Tuple
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_HTTP_URL = "http://api.waditu.com/dataapi"
+DEFAULT_TUSHARE_PROXY = "http://tushare.xyz:5000"
+DEFAULT_POOL_SIZE = 16
+
+def get_tushare_proxies() -> Dict[str, str]:
+    """
+    Proxy for Tushare traffic only (TUSHARE_PROXY; 'none' disables it).
+    """
+    proxy = os.getenv("TUSHARE_PROXY", DEFAULT_TUSHARE_PROXY)
+    if not proxy or proxy.lower() == "none":
+        return {}
+    return {"http": proxy, "https": proxy}
+
+def get_pool_size() -> int:
+    """Keep-alive connections per host (TUSHARE_POOL_SIZE); should cover TUSHARE_MAX_WORKERS."""
+    return int(os.getenv("TUSHARE_POOL_SIZE", DEFAULT_POOL_SIZE))
+
+_SESSIONS: Dict[Tuple, requests.Session] = {}
+_SESSIONS_LOCK = threading.Lock()
+
+def get_tushare_session(proxies: Dict[str, str]) -> requests.Session:
+    """
+    The process-wide pooled session for Tushare traffic through `proxies`:
+    keep-alive connection pool sized by TUSHARE_POOL_SIZE, gzip responses,
+    no proxy settings taken from the environment.
+    """
+    key = tuple(sorted(proxies.items()))
+    with _SESSIONS_LOCK:
+        session = _SESSIONS.get(key)
+        if session is None:
+            session = requests.Session()
+            session.trust_env = False  # Never pick up (or depend on) HTTP_PROXY from the environment
+            session.proxies.update(proxies)
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=get_pool_size())
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update({"Accept-Encoding": "gzip, deflate", "Connection": "keep-alive"})
+            _SESSIONS[key] = session
+        return session
+
+class TushareClient:
+    """
+    Tushare Pro client on the shared pooled HTTP session.
+
+    Same wire protocol and interface as `tushare.pro_api()` (`pro.daily(...)`,
+    `pro.query(api_name, ...)`), but requests go through the shared pooled
+    session: the proxy is configured there instead of the process environment,
+    and connections are kept alive across calls and threads.
+    """
+    def __init__(self, token: str, http_url: Optional[str] = None, timeout: float = 30,
+                 proxies: Optional[Dict[str, str]] = None):
+        self._token = token
+        self._http_url = http_url or os.getenv("TUSHARE_HTTP_URL", DEFAULT_HTTP_URL)
+        self._timeout = timeout
+        self.session = get_tushare_session(get_tushare_proxies() if proxies is None else proxies)
+
+    def query(self, api_name: str, fields: str = '', **kwargs) -> pd.DataFrame:
+        kwargs.setdefault('ts_type_name', self._http_url)
+        req_params = {
+            'api_name': api_name,
+            'token': self._token,
+            'params': kwargs,
+            'fields': fields,
+        }
+        res = self.session.post(f"{self._http_url}/{api_name}", json=req_params, timeout=self._timeout)
+        if not res:
+            return pd.DataFrame()
+        result = json.loads(res.text)
+        if result['code'] != 0:
+            raise Exception(result['msg'])
+        data = result['data']
+        return pd.DataFrame(data['items'], columns=data['fields'])
+
+    def __getattr__(self, name: str):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return partial(self.query, name)
@@ -0,0 +1,61 @@
+import time
+import threading
+import datetime
+import pandas as pd
+from .local_store import PartitionedStore
+
+UNIVERSE_FIELDS = 'ts_code,symbol,name,industry'
+
+# Listed universe changes at most once a day -> one partition per calendar day.
+_STORE = PartitionedStore("stock_basic")
+_KEEP_DAYS = 3
+# While stock_basic is failing, serve the stale copy for this long before trying the network again
+_STALE_RETRY_SECONDS = 300
+
+# In-process hot copy shared by all tools and sessions ("key" is None for a stale copy)
+_HOT = {"key": None, "df": None, "retry_at": 0.0}
+_LOCK = threading.Lock()
+
+def _today_key() -> str:
+    return datetime.date.today().strftime("%Y%m%d")
+
+def get_stock_universe(pro, refresh: bool = False) -> pd.DataFrame:
+    """
+    Return the listed A-share universe (ts_code, symbol, name, industry).
+
+    Lookup order: in-process copy -> today's on-disk partition -> pro.stock_basic.
+    If the network call fails, the newest older partition is served instead and
+    pinned for a few minutes, so an outage costs one network timeout per retry
+    window rather than one per call.
+    The returned DataFrame is shared; callers must not mutate it.
+    """
+    key = _today_key()
+    with _LOCK:
+        if not refresh and _HOT["key"] == key:
+            return _HOT["df"]
+        if not refresh and _HOT["key"] is None and _HOT["df"] is not None and time.monotonic() < _HOT["retry_at"]:
+            return _HOT["df"]  # Stale copy while the outage lasts
+
+        df = None if refresh else _STORE.read(key)
+        if df is None:
+            try:
+                df = pro.stock_basic(exchange='', list_status='L', fields=UNIVERSE_FIELDS)
+            except Exception as e:
+                df = None
+                print(f"[!] Warn: stock_basic fetch failed: {e}")
+
+            if df is not None and not df.empty:
+                _STORE.write(key, df)
+                _STORE.prune(keep=_KEEP_DAYS)
+            else:
+                stale_keys = _STORE.keys()
+                if not stale_keys:
+                    raise RuntimeError("Stock universe unavailable (network failed and no local cache).")
+                print(f"[!] Warn: Serving stale stock universe from {stale_keys[-1]}.")
+                df = _STORE.read(stale_keys[-1])
+                # Pin the stale copy only until the retry deadline, not for the whole day
+                _HOT.update(key=None, df=df, retry_at=time.monotonic() + _STALE_RETRY_SECONDS)
+                return df
+
+        _HOT.update(key=key, df=df, retry_at=0.0)
+        return df
@@ -0,0 +1,91 @@
+"""
+Measure request payload per ReAct step with and without the Gemini context cache,
+against a local stand-in for the Gemini REST API (no API key or network needed).
+
+Usage: python bench_prompt_cache.py
+"""
+import io
+import os
+import json
+import contextlib
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import google.generativeai as genai
+from aixiaoliang_agent.agent.code_agent import CodeAgent
+from aixiaoliang_agent.tools.registry import Tool
+
+CODE_STEPS = 4
+REQUESTS = []  # (path, request bytes)
+
+class StandInGemini(BaseHTTPRequestHandler):
+    """Scripted model: CODE_STEPS code steps, then a final answer."""
+    def _reply(self, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        REQUESTS.append((self.path, len(body)))
+        if "cachedContents" in self.path:
+            return self._reply({"name": "cachedContents/bench", "model": "models/stand-in"})
+
+        model_turns = sum(1 for c in json.loads(body).get("contents", []) if c.get("role") == "model")
+        if model_turns < CODE_STEPS:
+            text = f"Step {model_turns + 1}\n```python\nprint(ping())\n```"
+        else:
+            text = "总结: done"
+        self._reply([{"candidates": [{"content": {"role": "model", "parts": [{"text": text}]}}]}])
+
+    def do_DELETE(self):
+        self._reply({})
+
+    def log_message(self, *args):
+        pass
+
+def run_once(mode: str, history):
+    os.environ["GEMINI_CONTEXT_CACHE"] = mode
+    REQUESTS.clear()
+    with contextlib.redirect_stdout(io.StringIO()):  # Silence agent debug output
+        agent = CodeAgent(model_name="stand-in", tools=[Tool("ping", "Ping", lambda: "pong")])
+        list(agent.run("ping 四次", history=history, log_subdir="bench"))
+    generate = [n for path, n in REQUESTS if "GenerateContent" in path]
+    setup = sum(n for path, n in REQUESTS if "cachedContents" in path)
+    return generate, setup
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInGemini)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    genai.configure(api_key="bench", transport="rest",
+                    client_options={"api_endpoint": f"http://127.0.0.1:{server.server_port}"})
+
+    # A realistic multi-turn session: a few earlier Q&A pairs with full reports
+    history = []
+    for i in range(6):
+        history.append(f"User: 第{i}个问题：分析一下贵州茅台的估值和成长性")
+        history.append("Assistant: 总结: " + "茅台估值处于历史中位，营收和净利润保持稳定增长。" * 20)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        try:
+            results = {mode: run_once(mode, history) for mode in ("off", "auto")}
+        finally:
+            os.chdir(cwd)
+
+    print(f"{'step':>4} | {'inline prefix (bytes)':>22} | {'context cache (bytes)':>22}")
+    for i, (inline, cached) in enumerate(zip(results["off"][0], results["auto"][0]), start=1):
+        print(f"{i:>4} | {inline:>22} | {cached:>22}")
+    total_inline = sum(results["off"][0])
+    total_cached = sum(results["auto"][0]) + results["auto"][1]
+    print(f"total (incl. one-time cache upload {results['auto'][1]} bytes): "
+          f"{total_inline} vs {total_cached} ({1 - total_cached / total_inline:.0%} less)")
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
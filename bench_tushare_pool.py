@@ -0,0 +1,105 @@
+"""
+Compare Tushare request overhead: tushare's stock client (a fresh connection per
+call via requests.post) vs the pooled keep-alive TushareClient, against a local
+mock of the Tushare HTTP API (no token or network needed).
+
+Usage: python bench_tushare_pool.py
+"""
+import io
+import os
+import gzip
+import json
+import time
+import contextlib
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import tushare as ts
+from aixiaoliang_agent.tools import stock_data
+from aixiaoliang_agent.tools.rate_limiter import LimitedProApi, TushareLimiter
+from aixiaoliang_agent.tools.tushare_client import TushareClient
+
+N_STOCKS = 5000
+SERIAL_CALLS = 300
+CONNECTIONS = set()
+FINA_CALLS = [0]
+
+class MockTushare(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # Headers and body go out in separate writes
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        CONNECTIONS.add(self.client_address)
+        api, params = body["api_name"], body["params"]
+        if api == "stock_basic":
+            fields = ["ts_code", "symbol", "name", "industry"]
+            items = [[f"{i:06d}.SZ", f"{i:06d}", f"股票{i}", "银行"] for i in range(N_STOCKS)]
+        else:
+            FINA_CALLS[0] += 1
+            fields = ["ts_code", "end_date", "roe", "roe_dt", "gross_margin", "netprofit_margin", "dt_eps"]
+            items = [[c, params.get("period"), 10.0, 9.5, 30.0, 12.0, 1.1] for c in params["ts_code"].split(",")]
+        data = json.dumps({"code": 0, "msg": "", "data": {"fields": fields, "items": items}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            data = gzip.compress(data)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+def tushare_stock_client(url):
+    pro = ts.pro_api("bench")
+    pro._DataApi__http_url = url
+    return pro
+
+def measure(client, cache_dir):
+    """(serial ms/request, connections opened, get_financial_indicator seconds, fina_indicator requests)"""
+    stock_data._PRO = LimitedProApi(client, TushareLimiter(rate_per_min=10 ** 7, api_limits={}, share=1.0))
+    stock_data._IS_INIT = True
+    os.environ["DATA_CACHE_DIR"] = cache_dir
+
+    CONNECTIONS.clear()
+    start = time.perf_counter()
+    for i in range(SERIAL_CALLS):
+        client.fina_indicator(ts_code=f"{i:06d}.SZ", period="20250930", fields="ts_code,roe")
+    serial_ms = (time.perf_counter() - start) / SERIAL_CALLS * 1000
+    serial_connections = len(CONNECTIONS)
+
+    FINA_CALLS[0] = 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        stock_data.get_stock_universe(stock_data._PRO)  # Warm the universe outside the timing
+        start = time.perf_counter()
+        env = stock_data.get_financial_indicator("20250930", data_format="frame")
+        tool_s = time.perf_counter() - start
+    assert env["status"] == "success" and len(env["data"]) == N_STOCKS
+    return serial_ms, serial_connections, tool_s, FINA_CALLS[0]
+
+def main():
+    os.environ["TUSHARE_CACHE"] = "off"
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockTushare)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/dataapi"
+
+    variants = {
+        "tushare client (requests.post)": tushare_stock_client(url),
+        "pooled TushareClient": TushareClient("bench", http_url=url, proxies={}),
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {name: measure(client, os.path.join(tmp, str(i))) for i, (name, client) in enumerate(variants.items())}
+
+    print(f"{'client':<32} | {'serial ms/req':>13} | {'connections':>11} | {'get_financial_indicator':>23}")
+    for name, (serial_ms, conns, tool_s, calls) in results.items():
+        print(f"{name:<32} | {serial_ms:>13.2f} | {conns:>11} | {tool_s:>12.2f}s ({calls} req)")
+    (base_ms, _, base_s, _), (pooled_ms, _, pooled_s, _) = results.values()
+    print(f"per-request overhead: {1 - pooled_ms / base_ms:.0%} less; "
+          f"get_financial_indicator: {1 - pooled_s / base_s:.0%} less")
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
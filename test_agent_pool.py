@@ -0,0 +1,55 @@
+import time
+import threading
+
+from aixiaoliang_agent.agent.agent_pool import AgentPool
+
+class FakeAgent:
+    """Records runs and how many overlapped on this instance."""
+    def __init__(self):
+        self.memory = []
+        self.active = 0
+        self.max_active = 0
+
+    def run(self, query, session_id=None, **kwargs):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        self.memory = [query]
+        time.sleep(0.05)
+        yield f"{session_id}:{self.memory[0]}"
+        self.active -= 1
+
+def test_sessions_get_isolated_agents_and_run_concurrently():
+    pool = AgentPool(FakeAgent)
+    results = {}
+    def worker(sid):
+        results[sid] = list(pool.run(sid, f"q-{sid}"))
+
+    threads = [threading.Thread(target=worker, args=(f"s{i}",)) for i in range(8)]
+    start = time.time()
+    for t in threads: t.start()
+    for t in threads: t.join()
+
+    assert time.time() - start < 0.3, "Sessions must not be serialized"
+    assert results == {f"s{i}": [f"s{i}:q-s{i}"] for i in range(8)}
+    assert len({id(pool.get(f"s{i}")) for i in range(8)}) == 8
+
+def test_same_session_runs_are_serialized_and_agent_reused():
+    pool = AgentPool(FakeAgent)
+    threads = [threading.Thread(target=lambda q=q: list(pool.run("s", q))) for q in ("a", "b", "c")]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert len(pool) == 1
+    assert pool.get("s").max_active == 1
+
+def test_idle_sessions_evicted_lru():
+    pool = AgentPool(FakeAgent, max_sessions=2)
+    for sid in ("a", "b", "c"):
+        list(pool.run(sid, "q"))
+    assert len(pool) == 2
+    assert pool.get("a") is None and pool.get("c") is not None
+
+if __name__ == "__main__":
+    test_sessions_get_isolated_agents_and_run_concurrently()
+    test_same_session_runs_are_serialized_and_agent_reused()
+    test_idle_sessions_evicted_lru()
+    print("✅ Agent pool tests passed.")
@@ -0,0 +1,80 @@
+import datetime
+import pandas as pd
+
+from aixiaoliang_agent.tools import stock_data
+
+CODES = [f"{i:06d}.SZ" for i in range(120)]
+DELISTED = CODES[7]
+
+class FakePro:
+    """Multi-code daily / daily_basic / fina_indicator; records every request."""
+    def __init__(self):
+        self.requests = []
+
+    def _rows(self, api, ts_code, dates, **columns):
+        codes = ts_code.split(",")
+        self.requests.append((api, len(codes)))
+        rows = [dict(ts_code=c, **{k: v(c, d) for k, v in columns.items()}, **{"trade_date" if api != "fina_indicator" else "end_date": d})
+                for c in codes if c != DELISTED for d in dates]
+        return pd.DataFrame(rows)
+
+    def daily(self, ts_code, start_date, end_date, fields):
+        return self._rows("daily", ts_code, ["20251016", "20251017"],
+                          close=lambda c, d: float(int(c[:6]) + int(d[-1])), pct_chg=lambda c, d: 1.0)
+
+    def daily_basic(self, ts_code, start_date, end_date, fields):
+        dates = [d.strftime("%Y%m%d") for d in pd.bdate_range(start_date, end_date)][-10:]
+        return self._rows("daily_basic", ts_code, dates, pe=lambda c, d: 10.0, pe_ttm=lambda c, d: 8.0,
+                          pb=lambda c, d: 1.0, ps_ttm=lambda c, d: 2.0, total_mv=lambda c, d: 100.0)
+
+    def fina_indicator(self, ts_code, start_date, end_date, fields):
+        return self._rows("fina_indicator", ts_code, ["20250930", "20250630", "20250331", "20241231", "20240930"],
+                          roe=lambda c, d: 5.0)
+
+def _install(pro):
+    stock_data._PRO, stock_data._IS_INIT = pro, True
+
+def test_batch_price_coalesces_requests_and_returns_columns():
+    pro = FakePro()
+    _install(pro)
+    res = stock_data.get_current_price_batch(CODES[::-1])
+
+    assert res["status"] == "success" and res["meta"]["format"] == "columns"
+    assert len(pro.requests) < 10, pro.requests
+    data = res["data"]
+    assert list(data["ts_code"][:2]) == [CODES[-1], CODES[-2]], "input order is kept"
+    assert set(data["trade_date"]) == {"20251017"} and len(data["ts_code"]) == 119
+    assert data["close"][0] == 119 + 7
+    assert res["meta"]["coverage"]["missing_sample"] == [DELISTED]
+
+def test_batch_fundamentals_derive_ttm_figures():
+    _install(FakePro())
+    res = stock_data.get_fundamentals_data_batch("000001.SZ, 000002.SZ", data_format="frame")
+    df = res["data"]
+    assert list(df["ts_code"]) == ["000001.SZ", "000002.SZ"]
+    assert df["net_profit_ttm"].tolist() == [100.0 * 10000 / 8.0] * 2
+
+def test_batch_financials_keep_latest_quarters_per_stock():
+    _install(FakePro())
+    df = stock_data.get_stock_financials_batch(CODES[:3], limit=2, data_format="frame")["data"]
+    assert list(zip(df["ts_code"], df["end_date"])) == [
+        (CODES[0], "20250930"), (CODES[0], "20250630"),
+        (CODES[1], "20250930"), (CODES[1], "20250630"),
+        (CODES[2], "20250930"), (CODES[2], "20250630"),
+    ]
+
+def test_batch_valuation_history_sizes_chunks_to_row_cap():
+    pro = FakePro()
+    _install(pro)
+    start = datetime.date(2021, 1, 1)
+    res = stock_data.get_valuation_history_batch(CODES[:40], start.strftime("%Y-%m-%d"), "2025-12-31")
+    chunk = max(n for _, n in pro.requests)
+    assert chunk * ((datetime.date(2025, 12, 31) - start).days * 5 // 7 + 1) <= stock_data.MAX_ROWS_PER_REQUEST
+    assert len(res["data"]["ts_code"]) == 39 * 10  # DELISTED has no rows
+
+if __name__ == "__main__":
+    test_batch_price_coalesces_requests_and_returns_columns()
+    test_batch_fundamentals_derive_ttm_figures()
+    test_batch_financials_keep_latest_quarters_per_stock()
+    test_batch_valuation_history_sizes_chunks_to_row_cap()
+    print("✅ Batch tool tests passed.")
@@ -0,0 +1,33 @@
+import math
+import pandas as pd
+
+from aixiaoliang_agent.tools.derived_metrics import default_derived_metrics
+
+def test_matches_row_wise_formula():
+    df = pd.DataFrame({
+        "ts_code": ["000001.SZ", "600519.SH", "000002.SZ", "300750.SZ"],
+        "total_mv": [2000000.0, 180000000.0, 1000000.0, None],
+        "ps_ttm": [1.5, 10.0, 0.0, 2.0],
+        "pe_ttm": [5.0, None, -3.0, 20.0],
+    })
+    # The original per-row lambda from get_daily_basic
+    expected_rev = [(mv * 10000) / ps if ps else float('nan') for mv, ps in zip(df['total_mv'], df['ps_ttm'])]
+
+    out = default_derived_metrics.apply(df.copy())
+    for got, exp in zip(out['total_revenue_ttm'], expected_rev):
+        assert (math.isnan(got) and math.isnan(exp)) or math.isclose(got, exp)
+
+    assert math.isclose(out['net_profit_ttm'][0], 2000000.0 * 10000 / 5.0)
+    assert math.isnan(out['net_profit_ttm'][1])   # missing PE
+    assert out['net_profit_ttm'][2] < 0            # loss-making keeps its sign
+    assert math.isnan(out['total_revenue_ttm'][2])  # PS of 0
+
+def test_missing_source_columns_are_skipped():
+    df = pd.DataFrame({"ts_code": ["000001.SZ"], "total_mv": [1.0]})
+    out = default_derived_metrics.apply(df)
+    assert "total_revenue_ttm" not in out.columns
+
+if __name__ == "__main__":
+    test_matches_row_wise_formula()
+    test_missing_source_columns_are_skipped()
+    print("✅ Derived metrics tests passed.")
@@ -0,0 +1,83 @@
+import json
+import pandas as pd
+
+from aixiaoliang_agent.tools.data_utils import create_envelope, REPR_MAX_ROWS
+
+def _frame():
+    return pd.DataFrame({"ts_code": ["000001.SZ", "600519.SH"], "close": [10.0, 1500.0]})
+
+def test_records_default_keeps_code_alias():
+    res = create_envelope(_frame(), status="success")
+    assert res['data'] == [
+        {"ts_code": "000001.SZ", "close": 10.0, "code": "000001.SZ"},
+        {"ts_code": "600519.SH", "close": 1500.0, "code": "600519.SH"},
+    ]
+    assert "format" not in res['meta']
+
+def test_frame_format_is_not_materialized():
+    df = _frame()
+    res = create_envelope(df, status="success", data_format='frame', meta={"hint": "x"})
+    assert res['data'] is df
+    assert list(res['data']['code']) == list(df['ts_code'])
+    assert res['meta'] == {"hint": "x", "format": "frame"}
+    # Agent code written for records keeps working
+    assert pd.DataFrame(res['data']).shape == (2, 3)
+
+def test_columns_format():
+    res = create_envelope(_frame(), data_format='columns')
+    assert list(res['data']) == ["ts_code", "close", "code"]
+    assert res['data']['close'].tolist() == [10.0, 1500.0]
+
+def test_invalid_format_raises():
+    try:
+        create_envelope(_frame(), data_format='xml')
+    except ValueError:
+        return
+    raise AssertionError("Expected ValueError for unknown data_format")
+
+def test_data_materialized_on_access_only():
+    res = create_envelope(_frame(), status="success")
+    assert res['status'] == "success" and not res.materialized
+    assert "000001.SZ" in res.preview(limit=200)
+    assert not res.materialized, "preview must not build the records"
+    assert res['data'][0]['code'] == "000001.SZ"
+    assert res.materialized
+
+def test_large_envelope_repr_is_bounded():
+    n = REPR_MAX_ROWS * 50
+    big = pd.DataFrame({"ts_code": [f"{i:06d}.SZ" for i in range(n)], "close": 1.0})
+    res = create_envelope(big)
+    text = repr(res)
+    assert f"'rows': {n}" in text and len(text) < 1000
+    assert not res.materialized
+    # Small envelopes still print exactly like the old dict
+    small = create_envelope([{"ts_code": "000001.SZ"}], meta={"hint": "h"})
+    assert repr(small) == repr({"status": "success", "data": [{"ts_code": "000001.SZ"}], "meta": {"hint": "h"}, "error": None})
+    assert dict(small) == small.to_dict()
+
+def test_envelopes_behave_like_plain_json_dicts():
+    res = create_envelope(_frame(), status="success")
+    assert not res.materialized
+    assert json.loads(json.dumps(res, ensure_ascii=False))["data"][1]["code"] == "600519.SH"
+
+    scalar = create_envelope("10.5 (Date: 20251017)", meta={"hint": "x"})
+    assert json.loads(json.dumps(scalar)) == {"status": "success", "data": "10.5 (Date: 20251017)",
+                                              "meta": {"hint": "x"}, "error": None}
+
+    lazy = create_envelope(_frame())
+    plain = lazy.copy()
+    assert type(plain) is dict and plain["data"][0]["close"] == 10.0
+    assert dict(create_envelope(_frame()))["data"] == plain["data"]
+    lazy["meta"] = {"source": "test"}
+    lazy["data"] = []
+    assert lazy == {"status": "success", "data": [], "meta": {"source": "test"}, "error": None}
+
+if __name__ == "__main__":
+    test_records_default_keeps_code_alias()
+    test_frame_format_is_not_materialized()
+    test_columns_format()
+    test_invalid_format_raises()
+    test_data_materialized_on_access_only()
+    test_large_envelope_repr_is_bounded()
+    test_envelopes_behave_like_plain_json_dicts()
+    print("✅ Envelope format tests passed.")
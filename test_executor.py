@@ -0,0 +1,204 @@
+import time
+import threading
+
+from aixiaoliang_agent.agent.code_agent import CodeAgent
+from aixiaoliang_agent.agent.executor import InProcessExecutor, ExecutionError, capture_output
+from aixiaoliang_agent.tools.registry import Tool
+from aixiaoliang_agent.tools.fetch_engine import fetch_complete
+import pandas as pd
+
+def test_concurrent_executions_capture_only_their_own_output():
+    executor = InProcessExecutor()
+    results = {}
+    code = "import time\nfor i in range(5):\n    print(f'{tag}-{i}')\n    time.sleep(0.01)\n"
+
+    def worker(tag):
+        results[tag] = executor.execute(code, {"tag": tag})
+
+    # A background thread printing debug noise the whole time
+    stop = threading.Event()
+    def noise():
+        while not stop.is_set():
+            print("DEBUG: noise")
+            time.sleep(0.002)
+
+    noisy = threading.Thread(target=noise)
+    noisy.start()
+    threads = [threading.Thread(target=worker, args=(tag,)) for tag in ("a", "b", "c")]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    stop.set()
+    noisy.join()
+
+    for tag in ("a", "b", "c"):
+        assert results[tag] == "".join(f"{tag}-{i}\n" for i in range(5))
+
+def test_router_keeps_the_real_streams_attributes():
+    import sys
+    from aixiaoliang_agent.agent.executor import install_stdout_router
+    previous, sys.stdout = sys.stdout, sys.__stdout__
+    try:
+        install_stdout_router()
+        real = sys.__stdout__
+        assert sys.stdout is not real
+        assert sys.stdout.encoding == real.encoding and sys.stdout.errors == real.errors
+        assert sys.stdout.fileno() == real.fileno()
+        assert sys.stdout.isatty() == real.isatty()
+        assert sys.stdout.buffer is real.buffer
+    finally:
+        sys.stdout = previous
+
+def test_error_keeps_partial_output():
+    try:
+        InProcessExecutor().execute("print('before')\n1/0", {})
+    except ExecutionError as e:
+        assert e.output == "before\n"
+        assert isinstance(e.error, ZeroDivisionError)
+    else:
+        raise AssertionError("ExecutionError not raised")
+
+def test_fetch_worker_threads_print_into_callers_capture():
+    def fetch(chunk):
+        print(f"[*] fetching {chunk[0]}")
+        return pd.DataFrame({"ts_code": chunk})
+
+    with capture_output() as buf:
+        fetch_complete(fetch, ["A", "B"], chunk_size=1, max_workers=2)
+    assert sorted(buf.getvalue().splitlines()) == ["[*] fetching A", "[*] fetching B"]
+
+def test_run_namespace_persists_and_lists_variables():
+    calls = []
+    def load():
+        calls.append(1)
+        return pd.DataFrame({"ts_code": ["A", "B", "C"], "pe": [5.0, 20.0, 8.0]})
+
+    run = InProcessExecutor().start_run({"load": Tool("load", "", load)})
+    list(run.execute("import math\ndf = load()\nthreshold = 10"))
+    out = "".join(run.execute("print(len(df[df.pe < threshold]))"))
+
+    assert out == "2\n" and calls == [1]
+    assert run.variables() == ["df: DataFrame 3x2 [ts_code, pe]", "threshold: int = 10"]
+
+def test_cacheable_tool_calls_are_memoized_per_run():
+    calls = []
+    def quote(stock_code, adjust=None):
+        calls.append(stock_code)
+        return {"code": stock_code, "n": len(calls)}
+    def plot(stock_code):
+        calls.append("plot")
+
+    tools = {"quote": Tool("quote", "", quote, cache_ttl=60), "plot": Tool("plot", "", plot)}
+    run = InProcessExecutor().start_run(tools)
+    out = "".join(run.execute("a = quote('000001.SZ')\nb = quote(stock_code='000001.SZ')\nplot('x')\nplot('x')"))
+    "".join(run.execute("c = quote('000001.SZ', None)\nd = quote('600519.SH')"))
+
+    assert calls == ["000001.SZ", "plot", "plot", "600519.SH"]
+    assert run.namespace["a"] == run.namespace["b"] == run.namespace["c"] == {"code": "000001.SZ", "n": 1}
+    assert "   -> [Cached]" in out
+    assert run.tool_cache_stats() == {"hits": 2, "misses": 2, "hit_rate": 0.5}
+
+    # A new run starts with an empty memo
+    fresh = InProcessExecutor().start_run(tools)
+    "".join(fresh.execute("quote('000001.SZ')"))
+    assert calls[-1] == "000001.SZ"
+
+def test_memo_hits_do_not_share_mutable_data():
+    from aixiaoliang_agent.tools.data_utils import create_envelope
+    calls = []
+    def snap(trade_date, data_format='records'):
+        calls.append(trade_date)
+        df = pd.DataFrame({"ts_code": ["A", "B", "C"], "pe": [5.0, None, 8.0]})
+        return create_envelope(df, data_format=data_format)
+
+    run = InProcessExecutor().start_run({"snap": Tool("snap", "", snap, cache_ttl=60)})
+    "".join(run.execute(
+        "df = snap('1', data_format='frame')['data']\ndf.dropna(inplace=True)\ndf['x'] = 1\n"
+        "again = snap('1', data_format='frame')['data']\n"
+        "recs = snap('2')['data']\nrecs.pop()\nrecs[0]['pe'] = 0\nrecs2 = snap('2')['data']"))
+
+    assert calls == ["1", "2"]
+    again = run.namespace["again"]
+    assert len(again) == 3 and "x" not in again.columns
+    recs2 = run.namespace["recs2"]
+    assert len(recs2) == 3 and recs2[0]["pe"] == 5.0
+
+def test_memo_entries_expire():
+    calls = []
+    def quote(stock_code):
+        calls.append(stock_code)
+    run = InProcessExecutor().start_run({"quote": Tool("quote", "", quote, cache_ttl=0.05)})
+    "".join(run.execute("quote('A'); quote('A')"))
+    time.sleep(0.1)
+    "".join(run.execute("quote('A')"))
+    assert calls == ["A", "A"]
+
+def test_async_tools_run_concurrently_under_gather():
+    def quote(stock_code):
+        time.sleep(0.3)
+        print(f"fetched {stock_code}")
+        return stock_code.lower()
+
+    run = InProcessExecutor().start_run({"quote": Tool("quote", "", quote, cache_ttl=60)})
+    start = time.time()
+    out = "".join(run.execute("codes = ['A', 'B', 'C', 'D', 'E']\nres = gather(*[quote_async(c) for c in codes])"))
+    elapsed = time.time() - start
+
+    assert run.namespace["res"] == ["a", "b", "c", "d", "e"]
+    assert elapsed < 1.0, f"calls ran back-to-back ({elapsed:.2f}s)"
+    assert sorted(l for l in out.splitlines() if l.startswith("fetched")) == [f"fetched {c}" for c in "ABCDE"]
+    assert run.variables() == ["codes: list len=5", "res: list len=5"]
+
+    # Async calls share the run's memo; top-level await works too
+    out = "".join(run.execute("import asyncio\na, b = await asyncio.gather(quote_async('A'), quote_async(stock_code='B'))"))
+    assert out.count("-> [Cached]") == 2 and run.namespace["a"] == "a"
+
+class ContentsRecordingAgent(CodeAgent):
+    """Scripted replies; records the turns sent for every step."""
+    def __init__(self, replies, tools):
+        super().__init__(model_name="scripted", tools=tools)
+        self.replies = list(replies)
+        self.sent = []
+
+    def _generate_stream(self, contents):
+        self.sent.append(contents)
+        yield self.replies.pop(0)
+
+def test_agent_steps_share_variables_and_prompt_lists_them():
+    import os, tempfile
+    calls = []
+    def get_daily_basic():
+        calls.append(1)
+        return pd.DataFrame({"ts_code": ["A", "B"], "pe": [5.0, 20.0]})
+
+    agent = ContentsRecordingAgent([
+        "```python\nbasic = get_daily_basic()\nprint(len(basic))\n```",
+        "```python\nprint(basic[basic.pe < 10].ts_code.tolist())\n```",
+        "总结: A",
+    ], tools=[Tool("get_daily_basic", "Market snapshot", get_daily_basic)])
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            outputs = list(agent.run("低估值股票", stream_mode="full", log_subdir="tests"))
+        finally:
+            os.chdir(cwd)
+
+    assert calls == [1]
+    assert "['A']" in outputs[-1]
+    last_user_turn = agent.sent[1][-1]["parts"][0]
+    assert "Variables in memory" in last_user_turn
+    assert "- basic: DataFrame 2x2 [ts_code, pe]" in last_user_turn
+    assert "Variables in memory" not in agent.sent[0][-1]["parts"][0]
+
+if __name__ == "__main__":
+    test_concurrent_executions_capture_only_their_own_output()
+    test_router_keeps_the_real_streams_attributes()
+    test_error_keeps_partial_output()
+    test_fetch_worker_threads_print_into_callers_capture()
+    test_run_namespace_persists_and_lists_variables()
+    test_cacheable_tool_calls_are_memoized_per_run()
+    test_memo_hits_do_not_share_mutable_data()
+    test_memo_entries_expire()
+    test_async_tools_run_concurrently_under_gather()
+    test_agent_steps_share_variables_and_prompt_lists_them()
+    print("✅ Executor tests passed.")
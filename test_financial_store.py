@@ -0,0 +1,74 @@
+import os
+import tempfile
+import threading
+import pandas as pd
+
+from aixiaoliang_agent.tools.financial_store import load_financial_indicator
+
+FIELDS = 'ts_code,end_date,roe'
+CODES = [f"{i:06d}.SZ" for i in range(120)]
+NOT_REPORTED = {CODES[5]}
+
+class FakePro:
+    def __init__(self):
+        self.requested = []
+
+    def fina_indicator(self, ts_code, period, fields):
+        codes = [c for c in ts_code.split(",") if c not in NOT_REPORTED]
+        self.requested.extend(ts_code.split(","))
+        return pd.DataFrame({"ts_code": codes, "end_date": period, "roe": 10.0})
+
+def test_repeat_period_is_served_locally():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        os.environ["DATA_CACHE_DIR"] = cache_dir
+        pro = FakePro()
+
+        df, coverage = load_financial_indicator(pro, "20250930", CODES, FIELDS)
+        assert len(df) == 119 and coverage["fetched"] == 119
+        first_round = len(pro.requested)
+
+        # Repeat question: nothing left to fetch (the unreported code was checked today)
+        df, coverage = load_financial_indicator(pro, "20250930", CODES, FIELDS)
+        assert len(pro.requested) == first_round
+        assert coverage["local"] == 119 and coverage["missing"] == 1
+
+        # A newly listed stock is the only gap that gets back-filled
+        new_code = "688999.SH"
+        df, coverage = load_financial_indicator(pro, "20250930", CODES + [new_code], FIELDS)
+        assert pro.requested[first_round:] == [new_code]
+        assert new_code in set(df['ts_code'])
+
+class SlowPro(FakePro):
+    def __init__(self):
+        super().__init__()
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def fina_indicator(self, ts_code, period, fields):
+        self.started.set()
+        self.release.wait(5)
+        return super().fina_indicator(ts_code, period, fields)
+
+def test_concurrent_calls_for_a_period_fetch_once():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        os.environ["DATA_CACHE_DIR"] = cache_dir
+        pro = SlowPro()
+        results = []
+        run = lambda: results.append(load_financial_indicator(pro, "20250630", CODES, FIELDS, chunk_size=200))
+
+        first = threading.Thread(target=run)
+        first.start()
+        assert pro.started.wait(5)
+        second = threading.Thread(target=run)
+        second.start()
+        pro.release.set()
+        first.join(5); second.join(5)
+
+        reported = [c for c in pro.requested if c not in NOT_REPORTED]
+        assert sorted(reported) == sorted(set(CODES) - NOT_REPORTED), "The second caller must wait and read the stored rows"
+        assert [len(df) for df, _ in results] == [119, 119]
+
+if __name__ == "__main__":
+    test_repeat_period_is_served_locally()
+    test_concurrent_calls_for_a_period_fetch_once()
+    print("✅ Financial store tests passed.")
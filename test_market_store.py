@@ -0,0 +1,133 @@
+import os
+import datetime
+import tempfile
+import pandas as pd
+
+from aixiaoliang_agent.tools import market_store, stock_data
+from aixiaoliang_agent.tools.market_store import load_cross_section, get_market_store, latest_trade_date
+
+CST = market_store.MARKET_TZ
+
+def _snapshot(close):
+    return pd.DataFrame({"ts_code": ["000001.SZ", "600519.SH"], "close": [close, 1500.0]})
+
+def _days_ago(n):
+    return (datetime.date.today() - datetime.timedelta(days=n)).strftime("%Y%m%d")
+
+class FakePro:
+    def __init__(self, open_dates):
+        self.open_dates = open_dates
+        self.calls = []
+
+    def trade_cal(self, exchange, start_date, end_date, is_open):
+        self.calls.append("trade_cal")
+        return pd.DataFrame({"cal_date": self.open_dates, "is_open": 1})
+
+    def daily(self, ts_code=None, trade_date=None, limit=None):
+        self.calls.append(f"daily {ts_code or trade_date}")
+        return pd.DataFrame({"ts_code": [ts_code], "trade_date": ["20200101"], "close": [1.0]})
+
+def test_settled_date_served_locally():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        os.environ["DATA_CACHE_DIR"] = cache_dir
+        calls = []
+        def fetch():
+            calls.append(1)
+            return _snapshot(10.0)
+
+        load_cross_section('daily', '20240102', fetch)
+        df = load_cross_section('daily', '20240102', fetch)
+        assert len(calls) == 1, "Historical date should be read from the store"
+        assert list(df['close']) == [10.0, 1500.0]
+
+def test_unsettled_partition_is_refreshed():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        os.environ["DATA_CACHE_DIR"] = cache_dir
+        today_cst = datetime.datetime.now(CST).date()
+        today = today_cst.strftime("%Y%m%d")
+        load_cross_section('daily_basic', today, lambda: _snapshot(10.0))
+        # Pretend the stored copy was written before the close was published
+        morning = datetime.datetime.combine(today_cst, datetime.time(9, 30), tzinfo=CST).timestamp()
+        os.utime(get_market_store('daily_basic').path(today), (morning, morning))
+
+        df = load_cross_section('daily_basic', today, lambda: _snapshot(11.0))
+        assert df['close'].iloc[0] == 11.0
+
+        # If the refresh fails, the stored copy is served
+        def broken():
+            raise RuntimeError("network down")
+        os.utime(get_market_store('daily_basic').path(today), (morning, morning))
+        df = load_cross_section('daily_basic', today, broken)
+        assert df['close'].iloc[0] == 11.0
+
+        # ... unless the stored copy is unreadable: then the fetch error surfaces
+        with open(get_market_store('daily_basic').path(today), "wb") as f:
+            f.write(b"not parquet")
+        try:
+            load_cross_section('daily_basic', today, broken)
+        except RuntimeError as e:
+            assert "network down" in str(e)
+        else:
+            raise AssertionError("Fetch error not raised")
+
+def test_latest_trade_date_waits_for_the_close():
+    market_store._CALENDAR.clear()
+    pro = FakePro(["20251015", "20251016", "20251017"])
+    assert latest_trade_date(pro, datetime.datetime(2025, 10, 17, 10, 0, tzinfo=CST)) == "20251016"
+    market_store._CALENDAR.clear()
+    assert latest_trade_date(pro, datetime.datetime(2025, 10, 17, 15, 30, tzinfo=CST)) == "20251017"
+    market_store._CALENDAR.clear()
+    assert latest_trade_date(pro, datetime.datetime(2025, 10, 19, 9, 0, tzinfo=CST)) == "20251017"  # Weekend
+
+def test_latest_trade_date_uses_beijing_time_on_other_hosts():
+    pro = FakePro(["20251015", "20251016", "20251017"])
+    utc = datetime.timezone.utc
+    market_store._CALENDAR.clear()
+    # 08:00 UTC is 16:00 in Beijing: today's close is out
+    assert latest_trade_date(pro, datetime.datetime(2025, 10, 17, 8, 0, tzinfo=utc)) == "20251017"
+    market_store._CALENDAR.clear()
+    # 20:00 UTC on the 16th is already the morning of the 17th in Beijing, before the close
+    assert latest_trade_date(pro, datetime.datetime(2025, 10, 16, 20, 0, tzinfo=utc)) == "20251016"
+    market_store._CALENDAR.clear()
+    new_york = market_store.ZoneInfo("America/New_York")
+    assert latest_trade_date(pro, datetime.datetime(2025, 10, 17, 4, 0, tzinfo=new_york)) == "20251017"
+
+def test_point_lookups_served_from_loaded_snapshot():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        os.environ["DATA_CACHE_DIR"] = cache_dir
+        market_store._CALENDAR.clear()
+        market_store.get_cross_section_index().clear()
+        latest = _days_ago(3)
+        pro = FakePro([_days_ago(5), latest])
+        stock_data._PRO, stock_data._IS_INIT = pro, True
+
+        # No snapshot yet: per-stock request
+        assert stock_data.get_current_price("000001.SZ")["data"] == "1.0 (Date: 20200101)"
+        assert pro.calls == ["trade_cal", "daily 000001.SZ"]
+
+        snapshot = _snapshot(10.0).assign(trade_date=latest)
+        load_cross_section("daily", latest, lambda: snapshot)
+        assert stock_data.get_current_price("000001.SZ")["data"] == f"10.0 (Date: {latest})"
+        assert pro.calls == ["trade_cal", "daily 000001.SZ"], "answered from the snapshot"
+
+        # Codes outside the snapshot still go to Tushare
+        stock_data.get_current_price("300750.SZ")
+        assert pro.calls[2:] == ["daily 300750.SZ"]
+
+        # After a restart the settled partition is indexed straight from the store
+        index = market_store.get_cross_section_index()
+        index.clear()
+        assert market_store.lookup_latest(pro, 'daily', "600519.SH")["close"] == 1500.0
+
+        # An older snapshot never answers for the latest trade date
+        index.clear()
+        index.update('daily', _days_ago(5), snapshot)
+        assert index.lookup('daily', latest, "000001.SZ") is None
+
+if __name__ == "__main__":
+    test_settled_date_served_locally()
+    test_unsettled_partition_is_refreshed()
+    test_latest_trade_date_waits_for_the_close()
+    test_latest_trade_date_uses_beijing_time_on_other_hosts()
+    test_point_lookups_served_from_loaded_snapshot()
+    print("✅ Market store tests passed.")
@@ -0,0 +1,63 @@
+import os
+import tempfile
+
+from aixiaoliang_agent.agent.code_agent import CodeAgent
+from aixiaoliang_agent.tools.registry import Tool
+
+class PromptRecordingAgent(CodeAgent):
+    """Runs three code steps and a final answer, recording every request sent."""
+    def __init__(self, tools):
+        super().__init__(model_name="scripted", tools=tools)
+        self.requests = []
+        self.sanitize_calls = 0
+
+    def _sanitize_history(self, history):
+        self.sanitize_calls += 1
+        return super()._sanitize_history(history)
+
+    def _generate_stream(self, contents):
+        self.requests.append((self._llm_session.prefix, contents))
+        if len(self.requests) <= 3:
+            yield f"Step {len(self.requests)}\n```python\nprint(ping())\n```"
+        else:
+            yield "总结: done"
+
+def _run(agent, query, history):
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            list(agent.run(query, history=history, log_subdir="tests"))
+        finally:
+            os.chdir(cwd)
+
+def test_prefix_built_once_and_steps_sent_as_turns():
+    agent = PromptRecordingAgent(tools=[Tool("ping", "Ping", lambda: "pong")])
+    history = ["User: 你好", "Assistant: 你好！"]
+    _run(agent, "ping 三次", history)
+
+    assert len(agent.requests) == 4
+    assert agent.sanitize_calls == 1, "History should be sanitized once per run"
+    prefixes = {prefix for prefix, _ in agent.requests}
+    assert prefixes == {agent.get_prompt_prefix(history)}, "Prefix must be identical across steps"
+
+    first, last = agent.requests[0][1], agent.requests[-1][1]
+    assert [t["role"] for t in first] == ["user"]
+    assert first[0]["parts"][0].startswith("Current Task: ping 三次")
+    # Each step appends one model turn and one observation turn; earlier turns are unchanged
+    assert [t["role"] for t in last] == ["user", "model", "user", "model", "user", "model", "user"]
+    assert last[1]["parts"][0] == "Step 1\n```python\nprint(ping())\n```"
+    assert "### 🏁 Result\npong" in last[2]["parts"][0]
+    assert last[-1]["parts"][0].endswith("Your Next Step (Write Python Code):")
+
+def test_system_prompt_invalidated_on_tool_change():
+    agent = CodeAgent(model_name="scripted", tools=[Tool("ping", "Ping", lambda: "pong")])
+    first = agent._build_system_prompt()
+    assert agent._build_system_prompt() is first
+    agent.tools["pong"] = Tool("pong", "Pong", lambda: "ping")
+    assert "pong()" in agent._build_system_prompt()
+
+if __name__ == "__main__":
+    test_prefix_built_once_and_steps_sent_as_turns()
+    test_system_prompt_invalidated_on_tool_change()
+    print("✅ Prompt cache tests passed.")
@@ -0,0 +1,105 @@
+import os
+import time
+import sqlite3
+import tempfile
+import threading
+import pandas as pd
+
+from aixiaoliang_agent.tools.response_cache import ResponseCache, CachedProApi, _DiskTier
+
+class FakePro:
+    """Counts upstream calls per API."""
+    def __init__(self, delay=0.0):
+        self.calls = []
+        self.delay = delay
+
+    def daily(self, **kwargs):
+        self.calls.append(("daily", kwargs))
+        time.sleep(self.delay)
+        if kwargs.get("trade_date") == "20990101":
+            return pd.DataFrame(columns=["ts_code", "close"])
+        return pd.DataFrame({"ts_code": ["000001.SZ"], "close": [10.0]})
+
+    def plot_anything(self, **kwargs):
+        self.calls.append(("plot_anything", kwargs))
+        return "uncached"
+
+def test_hits_share_responses_across_callers_and_return_copies():
+    fake = FakePro()
+    pro = CachedProApi(fake, ResponseCache(10 * 1024 * 1024))
+
+    a = pro.daily(ts_code="000001.SZ", limit=1)
+    a["code"] = "mutated"  # Callers mutate frames in place
+    b = pro.daily(limit=1, ts_code="000001.SZ")
+
+    assert len(fake.calls) == 1
+    assert "code" not in b.columns
+    pro.plot_anything(x=1); pro.plot_anything(x=1)
+    assert len(fake.calls) == 3, "APIs without a TTL pass through"
+    stats = pro._cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1 and stats["by_api"]["daily"]["hits"] == 1
+
+def test_empty_frames_are_not_cached_and_entries_expire():
+    fake = FakePro()
+    pro = CachedProApi(fake, ResponseCache(10 * 1024 * 1024, ttls={"daily": 0.05}))
+    pro.daily(trade_date="20990101"); pro.daily(trade_date="20990101")
+    assert len(fake.calls) == 2
+    pro.daily(trade_date="20250101"); time.sleep(0.1); pro.daily(trade_date="20250101")
+    assert len(fake.calls) == 4
+
+def test_lru_eviction_by_bytes():
+    df = pd.DataFrame({"x": range(1000)})
+    size = int(df.memory_usage(index=True, deep=True).sum())
+    cache = ResponseCache(int(size * 2.5), ttls={"daily": 60})
+    for day in ("1", "2"):
+        cache.fetch("daily", {"d": day}, lambda: df)
+    cache.fetch("daily", {"d": "1"}, lambda: df)  # Touch "1"; "2" is now least recent
+    cache.fetch("daily", {"d": "3"}, lambda: df)
+    stats = cache.stats()
+    assert stats["entries"] == 2 and stats["bytes"] <= cache.max_bytes
+    assert stats["by_api"]["daily"]["evictions"] == 1
+    calls = []
+    cache.fetch("daily", {"d": "1"}, lambda: calls.append(1) or df)
+    assert calls == []
+
+def test_concurrent_misses_make_one_upstream_call():
+    fake = FakePro(delay=0.2)
+    pro = CachedProApi(fake, ResponseCache(10 * 1024 * 1024))
+    threads = [threading.Thread(target=lambda: pro.daily(trade_date="20250102")) for _ in range(5)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert len(fake.calls) == 1
+
+def test_sqlite_tier_survives_restart():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "responses.sqlite")
+        fake = FakePro()
+        CachedProApi(fake, ResponseCache(1 << 20, disk=_DiskTier(path, 1 << 20))).daily(trade_date="20250103")
+        # A new process: empty memory tier, same file
+        df = CachedProApi(fake, ResponseCache(1 << 20, disk=_DiskTier(path, 1 << 20))).daily(trade_date="20250103")
+        assert len(fake.calls) == 1
+        assert df["close"].tolist() == [10.0]
+
+def test_locked_sqlite_file_falls_back_to_network():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "responses.sqlite")
+        fake = FakePro()
+        cache = ResponseCache(1 << 20, disk=_DiskTier(path, 1 << 20, timeout=0.05))
+        other_process = sqlite3.connect(path)
+        other_process.execute("BEGIN EXCLUSIVE")
+        try:
+            df = CachedProApi(fake, cache).daily(trade_date="20250103")
+        finally:
+            other_process.rollback()
+            other_process.close()
+        assert df["close"].tolist() == [10.0] and len(fake.calls) == 1
+        assert cache.stats()["misses"] == 1
+
+if __name__ == "__main__":
+    test_hits_share_responses_across_callers_and_return_copies()
+    test_empty_frames_are_not_cached_and_entries_expire()
+    test_lru_eviction_by_bytes()
+    test_concurrent_misses_make_one_upstream_call()
+    test_sqlite_tier_survives_restart()
+    test_locked_sqlite_file_falls_back_to_network()
+    print("✅ Response cache tests passed.")
@@ -0,0 +1,95 @@
+import time
+import threading
+
+from aixiaoliang_agent.agent.executor import ExecutionError
+from aixiaoliang_agent.agent.sandbox import SandboxExecutor, SandboxLimitExceeded, SandboxError
+
+# Tool resolved by name inside the workers (this module is their tool module)
+def ping():
+    return "pong"
+
+def _executor(**kwargs):
+    executor = SandboxExecutor(tool_modules=("test_sandbox_executor",), **kwargs)
+    executor.warm_up()
+    return executor
+
+def _expect_error(run, code):
+    try:
+        list(run.execute(code))
+    except ExecutionError as e:
+        return e
+    raise AssertionError("ExecutionError not raised")
+
+def test_streams_output_and_calls_tools_in_worker():
+    executor = _executor(workers=1)
+    try:
+        run = executor.start_run({"ping": ping})
+        start = time.time()
+        arrivals = []
+        for chunk in run.execute("import time\nprint('first')\ntime.sleep(0.5)\nprint(ping())"):
+            arrivals.append((chunk, time.time() - start))
+        gathered = "".join(run.execute("print(gather(ping_async(), ping_async()))"))
+        run.close()
+    finally:
+        executor.shutdown()
+
+    text = "".join(c for c, _ in arrivals)
+    assert text.startswith("first\n")
+    assert "🔧 [Tool Call] ping()" in text and text.endswith("pong\n")
+    assert arrivals[0][1] < arrivals[-1][1] - 0.3, "stdout was not streamed incrementally"
+    assert gathered.endswith("['pong', 'pong']\n")
+
+def test_errors_and_limits_keep_pool_usable():
+    executor = _executor(workers=1, timeout=2, cpu_seconds=1, memory_mb=1024)
+    try:
+        run = executor.start_run({})
+        e = _expect_error(run, "print('partial')\nraise ValueError('bad input')")
+        assert isinstance(e.error, SandboxError) and e.error.error_type == "ValueError"
+        assert str(e) == "bad input" and e.output == "partial\n"
+
+        e = _expect_error(run, "while True: pass")
+        assert isinstance(e.error, SandboxError) and "CPU time limit" in str(e)
+
+        e = _expect_error(run, "x = bytearray(4 * 1024 ** 3)")
+        assert e.error.error_type == "MemoryError"
+        run.close()
+
+        run = executor.start_run({})
+        e = _expect_error(run, "import time\ntime.sleep(10)")
+        assert isinstance(e.error, SandboxLimitExceeded)
+        run.close()  # Killed worker is replaced
+
+        run = executor.start_run({})
+        assert "".join(run.execute("import pandas as pd\ndf = pd.DataFrame({'a': [1, 2]})")) == ""
+        assert "".join(run.execute("print(df.a.sum())")) == "3\n"  # Namespace persists in the worker
+        assert run.variables() == ["df: DataFrame 2x1 [a]"]
+        run.close()
+
+        run = executor.start_run({})  # Same worker, fresh namespace
+        e = _expect_error(run, "print(df)")
+        assert e.error.error_type == "NameError"
+        run.close()
+    finally:
+        executor.shutdown()
+
+def test_runs_execute_in_parallel_processes():
+    executor = _executor(workers=2)
+    try:
+        runs = [executor.start_run({}) for _ in range(2)]
+        code = "import os, time\ntime.sleep(1)\nprint(os.getpid())"
+        pids = []
+        threads = [threading.Thread(target=lambda r=r: pids.append("".join(r.execute(code)))) for r in runs]
+        start = time.time()
+        for t in threads: t.start()
+        for t in threads: t.join()
+        assert time.time() - start < 1.8
+        assert len(set(pids)) == 2
+        for r in runs: r.close()
+    finally:
+        executor.shutdown()
+
+if __name__ == "__main__":
+    test_streams_output_and_calls_tools_in_worker()
+    test_errors_and_limits_keep_pool_usable()
+    test_runs_execute_in_parallel_processes()
+    print("✅ Sandbox executor tests passed.")
@@ -0,0 +1,58 @@
+import time
+import pandas as pd
+
+from aixiaoliang_agent.tools.search_index import StockSearchIndex, lazy_pinyin
+
+UNIVERSE = pd.DataFrame({
+    "ts_code": ["000001.SZ", "601318.SH", "600519.SH", "600036.SH", "000002.SZ"],
+    "symbol": ["000001", "601318", "600519", "600036", "000002"],
+    "name": ["平安银行", "中国平安", "贵州茅台", "招商银行", "万科A"],
+    "industry": ["银行", "保险", "白酒", "银行", "全国地产"],
+})
+
+def _names(index, keyword):
+    return [index.names[i] for i in index.search(keyword)]
+
+def test_exact_code_and_symbol():
+    index = StockSearchIndex(UNIVERSE)
+    assert _names(index, "000001.SZ")[0] == "平安银行"
+    assert _names(index, "600519")[0] == "贵州茅台"
+
+def test_prefix_ranks_before_substring():
+    index = StockSearchIndex(UNIVERSE)
+    # '平安' is a name prefix of 平安银行 but only a substring of 中国平安
+    assert _names(index, "平安") == ["平安银行", "中国平安"]
+    assert set(_names(index, "银行")) == {"平安银行", "招商银行"}
+    assert _names(index, "不存在") == []
+
+def test_code_fragment_from_the_middle():
+    index = StockSearchIndex(UNIVERSE)
+    assert _names(index, "0519") == ["贵州茅台"]
+    # Prefix matches still rank first
+    assert _names(index, "6005") == ["贵州茅台"]
+    assert set(_names(index, "00")[:2]) == {"平安银行", "万科A"}
+
+def test_pinyin_initials():
+    if lazy_pinyin is None:
+        print("pypinyin not installed, skipping.")
+        return
+    index = StockSearchIndex(UNIVERSE)
+    assert _names(index, "payh")[0] == "平安银行"
+    assert _names(index, "GZMT")[0] == "贵州茅台"
+    assert _names(index, "zhaoshang")[0] == "招商银行"
+
+def test_search_is_sub_millisecond():
+    index = StockSearchIndex(UNIVERSE)
+    start = time.perf_counter()
+    for _ in range(1000):
+        index.search("平安")
+    per_call_ms = (time.perf_counter() - start)
+    assert per_call_ms < 1.0, f"Search too slow: {per_call_ms:.3f} ms/call"
+
+if __name__ == "__main__":
+    test_exact_code_and_symbol()
+    test_prefix_ranks_before_substring()
+    test_code_fragment_from_the_middle()
+    test_pinyin_initials()
+    test_search_is_sub_millisecond()
+    print("✅ Search index tests passed.")
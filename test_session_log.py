@@ -0,0 +1,91 @@
+import os
+import json
+import tempfile
+
+from aixiaoliang_agent.agent.code_agent import CodeAgent
+from aixiaoliang_agent.agent.session_log import SessionLogWriter, read_session
+from aixiaoliang_agent.tools.registry import Tool
+
+class ScriptedAgent(CodeAgent):
+    """CodeAgent whose model replies are scripted instead of Gemini calls."""
+    def __init__(self, replies, tools):
+        super().__init__(model_name="scripted", tools=tools)
+        self.replies = list(replies)
+
+    def _generate_stream(self, prompt):
+        yield self.replies.pop(0)
+
+def test_writer_appends_one_line_per_event_and_only_on_flush():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "s.jsonl")
+        log = SessionLogWriter(path, background=False)
+        log.write({"event": "run_start", "timestamp": "t0", "query": "q"})
+        log.write({"event": "step", "type": "thought", "content": "x" * 1000})
+        assert not os.path.exists(path), "Events must be buffered until a step boundary"
+
+        log.flush()
+        with open(path, "rb") as f:
+            first_flush = f.read()
+        log.write({"event": "step", "type": "execution_trace", "content": "ok"})
+        log.write({"event": "run_end", "success": True})
+        log.close()
+
+        with open(path, "rb") as f:
+            raw = f.read()
+        assert raw.startswith(first_flush), "Earlier lines must never be rewritten"
+        lines = raw.decode("utf-8").splitlines()
+        assert [json.loads(l)["event"] for l in lines] == ["run_start", "step", "step", "run_end"]
+
+        runs = read_session(path)
+        assert len(runs) == 1
+        assert runs[0]["query"] == "q" and runs[0]["success"] is True
+        assert [s["type"] for s in runs[0]["steps"]] == ["thought", "execution_trace"]
+
+def test_background_writer_and_multiple_runs_per_session():
+    with tempfile.TemporaryDirectory() as tmp:
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        try:
+            for query in ("第一问", "第二问"):
+                agent = ScriptedAgent(["```python\nprint(ping())\nprint(ping())\n```", "总结: done"],
+                                      tools=[Tool("ping", "Ping", lambda: "pong", cache_ttl=60)])
+                list(agent.run(query, session_id="s1", log_subdir="tests"))
+            runs = read_session(os.path.join("logs", "tests", "s1.jsonl"))
+        finally:
+            os.chdir(cwd)
+
+    # Appending keeps earlier runs of the same session
+    assert [r["query"] for r in runs] == ["第一问", "第二问"]
+    steps = runs[-1]["steps"]
+    assert [s["type"] for s in steps] == ["thought", "code", "execution_trace", "thought"]
+    assert "pong" in steps[2]["content"]
+    assert runs[-1]["success"] is True
+    assert runs[-1]["tool_cache"] == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+
+def test_reader_accepts_legacy_whole_file_json():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "old.jsonl")
+        legacy = {"timestamp": "t", "query": "q", "steps": [{"type": "thought", "content": "c"}]}
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(legacy, ensure_ascii=False, indent=2) + "\n")
+        assert read_session(path) == [legacy]
+
+def test_reader_skips_a_torn_trailing_line():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "crashed.jsonl")
+        events = [
+            {"event": "run_start", "timestamp": "t", "query": "q"},
+            {"event": "step", "type": "thought", "content": "c"},
+        ]
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("".join(json.dumps(e, ensure_ascii=False) + "\n" for e in events))
+            f.write('{"event": "step", "type": "code", "cont')  # Killed mid-append
+        runs = read_session(path)
+        assert runs == [{"timestamp": "t", "query": "q", "steps": [{"type": "thought", "content": "c"}]}]
+
+if __name__ == "__main__":
+    test_writer_appends_one_line_per_event_and_only_on_flush()
+    test_background_writer_and_multiple_runs_per_session()
+    test_reader_accepts_legacy_whole_file_json()
+    test_reader_skips_a_torn_trailing_line()
+    print("✅ Session log tests passed.")
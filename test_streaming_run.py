@@ -0,0 +1,49 @@
+import os
+import tempfile
+
+from aixiaoliang_agent.agent.code_agent import CodeAgent
+from aixiaoliang_agent.tools.registry import Tool
+
+class ScriptedAgent(CodeAgent):
+    """CodeAgent whose model replies are scripted chunk lists instead of Gemini calls."""
+    def __init__(self, replies, tools):
+        super().__init__(model_name="scripted", tools=tools)
+        self.replies = list(replies)
+        self.chunks_consumed = 0
+
+    def _generate_stream(self, prompt):
+        for chunk in self.replies.pop(0):
+            self.chunks_consumed += 1
+            yield chunk
+
+def _run(agent, query):
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            return list(agent.run(query, stream_mode="full", log_subdir="tests"))
+        finally:
+            os.chdir(cwd)
+
+def test_stream_shows_partial_thought_and_stops_at_closing_fence():
+    calls = []
+    def lookup(keyword):
+        calls.append(keyword)
+        return "000001.SZ"
+
+    step_1 = ["Thought: look up ", "the code.\n", "```python\nprint(lookup('平安'))\n", "```", "\nObservation: fake", " never read"]
+    step_2 = ["总结: ", "平安银行的代码是 000001.SZ"]
+    agent = ScriptedAgent([step_1, step_2], tools=[Tool("lookup", "Find a code", lookup)])
+
+    outputs = _run(agent, "平安银行代码")
+
+    assert any("Thought: look up" in o and "lookup('平安')" not in o for o in outputs), "Partial thought not streamed"
+    assert calls == ["平安"]
+    # The stream was abandoned right after the closing fence
+    assert agent.chunks_consumed == len(step_1) - 2 + len(step_2)
+    assert "Observation: fake" not in agent.memory[1].thought
+    assert outputs[-1].endswith("总结: 平安银行的代码是 000001.SZ")
+
+if __name__ == "__main__":
+    test_stream_shows_partial_thought_and_stops_at_closing_fence()
+    print("✅ Streaming run test passed.")
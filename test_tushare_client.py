@@ -0,0 +1,85 @@
+import os
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from aixiaoliang_agent.tools.tushare_client import TushareClient
+
+REQUESTS = []
+
+class MockTushare(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        REQUESTS.append((self.path, body, self.client_address[1]))
+        if body["api_name"] == "bad":
+            payload = {"code": 40203, "msg": "抱歉，您没有访问该接口的权限", "data": None}
+        else:
+            payload = {"code": 0, "msg": "", "data": {"fields": ["ts_code", "close"], "items": [[body["params"]["ts_code"], 10.5]]}}
+        data = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+def test_client_uses_its_own_session_and_leaves_env_alone():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockTushare)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    env_before = {k: os.environ.get(k) for k in ("HTTP_PROXY", "http_proxy")}
+    os.environ["HTTP_PROXY"] = "http://127.0.0.1:9"  # A dead proxy the client must ignore
+    try:
+        pro = TushareClient("token", http_url=f"http://127.0.0.1:{server.server_port}/dataapi", proxies={})
+        df = pro.daily(ts_code="000001.SZ", fields="ts_code,close")
+        df2 = pro.query("daily", ts_code="600519.SH")
+
+        assert df.to_dict("records") == [{"ts_code": "000001.SZ", "close": 10.5}]
+        assert df2["ts_code"][0] == "600519.SH"
+        path, body, _ = REQUESTS[0]
+        assert path == "/dataapi/daily" and body["token"] == "token" and body["fields"] == "ts_code,close"
+        assert REQUESTS[0][2] == REQUESTS[1][2], "Connection was not reused"
+        assert os.environ["HTTP_PROXY"] == "http://127.0.0.1:9"
+
+        try:
+            pro.bad(ts_code="x")
+        except Exception as e:
+            assert "没有访问该接口的权限" in str(e)
+        else:
+            raise AssertionError("API error not raised")
+    finally:
+        for k, v in env_before.items():
+            if v is None: os.environ.pop(k, None)
+            else: os.environ[k] = v
+        server.shutdown()
+
+def test_proxy_comes_from_tushare_proxy_setting():
+    os.environ["TUSHARE_PROXY"] = "http://relay.example:5000"
+    try:
+        assert TushareClient("t").session.proxies == {"http": "http://relay.example:5000", "https": "http://relay.example:5000"}
+        os.environ["TUSHARE_PROXY"] = "none"
+        assert TushareClient("t").session.proxies == {}
+    finally:
+        os.environ.pop("TUSHARE_PROXY")
+
+def test_clients_share_one_pooled_session():
+    os.environ["TUSHARE_POOL_SIZE"] = "24"
+    try:
+        proxies = {"http": "http://pool.example:5000"}
+        a, b = TushareClient("t1", proxies=proxies), TushareClient("t2", proxies=proxies)
+        assert a.session is b.session
+        assert a.session is not TushareClient("t", proxies={}).session
+        adapter = a.session.get_adapter("http://api.waditu.com/dataapi")
+        assert adapter._pool_maxsize == 24
+        assert "gzip" in a.session.headers["Accept-Encoding"]
+    finally:
+        os.environ.pop("TUSHARE_POOL_SIZE")
+
+if __name__ == "__main__":
+    test_client_uses_its_own_session_and_leaves_env_alone()
+    test_proxy_comes_from_tushare_proxy_setting()
+    test_clients_share_one_pooled_session()
+    print("✅ Tushare client tests passed.")
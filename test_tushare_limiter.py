@@ -0,0 +1,96 @@
+import time
+import pandas as pd
+
+from aixiaoliang_agent.tools.rate_limiter import TushareLimiter, LimitedProApi, quota_session
+from aixiaoliang_agent.tools.fetch_engine import fetch_complete
+
+class FakePro:
+    def __init__(self):
+        self.failures = 0
+        self.income_calls = 0
+
+    def daily(self, ts_code=None):
+        return pd.DataFrame({"ts_code": ts_code.split(",")})
+
+    def fina_indicator(self, ts_code=None):
+        if self.failures:
+            self.failures -= 1
+            raise Exception("抱歉，您每分钟最多访问该接口200次，权限的具体详情访问：https://tushare.pro/document/1?doc_id=108。")
+        return pd.DataFrame({"ts_code": [ts_code]})
+
+    def income(self, ts_code=None):
+        self.income_calls += 1
+        raise Exception("抱歉，您每天最多访问该接口100000次，权限的具体详情访问：https://tushare.pro/document/1?doc_id=108。")
+
+    def query(self, api_name, fields="", **kwargs):
+        return pd.DataFrame({"api": [api_name]})
+
+def test_calls_queue_per_api_instead_of_failing():
+    limiter = TushareLimiter(rate_per_min=120, api_limits={"fina_indicator": 6000}, share=1.0)
+    pro = LimitedProApi(FakePro(), limiter)
+
+    start = time.time()
+    for _ in range(14):  # Burst is 12, then 2 calls/s
+        pro.daily(ts_code="A")
+    assert time.time() - start > 0.7
+
+    start = time.time()
+    for _ in range(14):  # Separate bucket, not slowed by daily
+        pro.fina_indicator(ts_code="A")
+    assert time.time() - start < 0.3
+
+    stats = limiter.stats()
+    assert stats["calls"] == 28 and stats["by_api"]["daily"]["wait_seconds"] > 0.7
+    assert pro.query("trade_cal")["api"][0] == "trade_cal"
+    assert limiter.stats()["by_api"]["trade_cal"]["calls"] == 1
+
+def test_server_limit_error_is_retried_after_backoff():
+    fake = FakePro()
+    fake.failures = 2
+    limiter = TushareLimiter(rate_per_min=6000, api_limits={}, share=1.0, backoff=0.01)
+    df = LimitedProApi(fake, limiter).fina_indicator(ts_code="A")
+    assert df["ts_code"][0] == "A"
+    usage = limiter.stats()
+    assert usage["calls"] == 3 and usage["limit_retries"] == 2 and usage["errors"] == 0
+
+def test_usage_is_attributed_to_sessions_across_fetch_threads():
+    limiter = TushareLimiter(rate_per_min=6000, api_limits={}, share=1.0)
+    pro = LimitedProApi(FakePro(), limiter)
+    codes = [f"{i:06d}.SZ" for i in range(10)]
+
+    with quota_session("s1"):
+        fetch_complete(lambda chunk: pro.daily(ts_code=",".join(chunk)), codes, chunk_size=2, max_workers=4)
+    with quota_session("s2"):
+        pro.daily(ts_code="A")
+    pro.daily(ts_code="B")  # No session
+
+    assert limiter.session_stats("s1")["calls"] == 5
+    assert limiter.session_stats("s2")["calls"] == 1
+    assert limiter.stats()["calls"] == 7
+def test_daily_quota_error_is_raised_without_retries():
+    fake = FakePro()
+    limiter = TushareLimiter(rate_per_min=6000, api_limits={}, share=1.0, backoff=10)
+    start = time.time()
+    try:
+        LimitedProApi(fake, limiter).income(ts_code="A")
+    except Exception as e:
+        assert "每天最多访问" in str(e)
+    else:
+        raise AssertionError("Daily quota error not raised")
+    assert time.time() - start < 1 and fake.income_calls == 1
+    usage = limiter.stats()
+    assert usage["limit_retries"] == 0 and usage["errors"] == 1
+    assert limiter.bucket("income").tokens > 0, "bucket must not be drained"
+
+def test_rate_share_splits_the_budget():
+    limiter = TushareLimiter(rate_per_min=2000, api_limits={"daily": 500}, share=0.25)
+    assert round(limiter.bucket("daily").rate * 60) == 125
+    assert round(limiter.bucket("fina_indicator").rate * 60) == 500
+
+if __name__ == "__main__":
+    test_calls_queue_per_api_instead_of_failing()
+    test_server_limit_error_is_retried_after_backoff()
+    test_usage_is_attributed_to_sessions_across_fetch_threads()
+    test_daily_quota_error_is_raised_without_retries()
+    test_rate_share_splits_the_budget()
+    print("✅ Tushare limiter tests passed.")
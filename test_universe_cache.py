@@ -0,0 +1,77 @@
+import os
+import tempfile
+import pandas as pd
+
+from aixiaoliang_agent.tools import universe
+
+class FakePro:
+    """Counts stock_basic calls instead of hitting Tushare."""
+    def __init__(self):
+        self.calls = 0
+
+    def stock_basic(self, **kwargs):
+        self.calls += 1
+        return pd.DataFrame({
+            "ts_code": ["000001.SZ", "600519.SH"],
+            "symbol": ["000001", "600519"],
+            "name": ["平安银行", "贵州茅台"],
+            "industry": ["银行", "白酒"],
+        })
+
+def _reset(cache_dir):
+    os.environ["DATA_CACHE_DIR"] = cache_dir
+    universe._HOT["key"] = None
+    universe._HOT["df"] = None
+    universe._HOT["retry_at"] = 0.0
+
+def test_universe_cached_in_process_and_on_disk():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        _reset(cache_dir)
+        pro = FakePro()
+
+        df1 = universe.get_stock_universe(pro)
+        df2 = universe.get_stock_universe(pro)
+        assert pro.calls == 1, "Hot copy should serve repeat lookups"
+        assert df1 is df2
+
+        # New process: hot copy gone, disk partition still valid for today
+        universe._HOT["key"] = None
+        df3 = universe.get_stock_universe(pro)
+        assert pro.calls == 1, "Disk partition should serve a cold process"
+        assert list(df3['ts_code']) == ["000001.SZ", "600519.SH"]
+
+        universe.get_stock_universe(pro, refresh=True)
+        assert pro.calls == 2
+
+class DownPro:
+    def __init__(self):
+        self.calls = 0
+
+    def stock_basic(self, **kwargs):
+        self.calls += 1
+        raise ConnectionError("timed out")
+
+def test_stale_copy_is_pinned_until_the_retry_deadline():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        _reset(cache_dir)
+        universe._STORE.write("20000101", FakePro().stock_basic())
+        pro = DownPro()
+
+        for _ in range(3):
+            df = universe.get_stock_universe(pro)
+        assert pro.calls == 1, "Calls during the outage must not wait on the network"
+        assert list(df['ts_code']) == ["000001.SZ", "600519.SH"]
+
+        universe._HOT["retry_at"] = 0.0  # Deadline passed
+        universe.get_stock_universe(pro)
+        assert pro.calls == 2
+
+        # Recovery replaces the stale copy with today's universe
+        universe._HOT["retry_at"] = 0.0
+        universe.get_stock_universe(FakePro())
+        assert universe._HOT["key"] == universe._today_key()
+
+if __name__ == "__main__":
+    test_universe_cached_in_process_and_on_disk()
+    test_stale_copy_is_pinned_until_the_retry_deadline()
+    print("✅ Universe cache test passed.")